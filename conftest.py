@@ -0,0 +1,38 @@
+"""Shared pytest configuration for the test scripts."""
+import os
+
+from dotenv import load_dotenv
+
+
+def pytest_configure(config):
+    """Load .env once per session, before test modules are imported.
+    
+    Test modules read credentials at import time (for skipif markers), so
+    this cannot be a session fixture: fixtures only run after collection.
+    """
+    load_dotenv()
+    _install_http_cache()
+
+
+def _install_http_cache():
+    """Cache Polymarket GET responses between test runs.
+    
+    Repeated runs hit disk instead of the network. Set TEST_HTTP_CACHE_TTL=0
+    (in the environment or .env) to always test live.
+    """
+    ttl = int(os.getenv('TEST_HTTP_CACHE_TTL', '300'))
+    if ttl <= 0:
+        return
+    
+    try:
+        import requests_cache
+    except ImportError:
+        return
+    
+    os.makedirs('data', exist_ok=True)
+    requests_cache.install_cache(
+        'data/.test_http_cache',
+        backend='sqlite',
+        expire_after=ttl,
+        allowable_methods=('GET',)
+    )
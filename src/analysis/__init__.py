@@ -1,8 +1,8 @@
 """Analysis modules for edge detection."""
-from .edge_detector import EdgeDetector
+from .edge_detector import EdgeDetector, trades_to_array
 from .position_sizing import PositionSizer
 from .risk_manager import RiskManager
 from .correlation_analyzer import CorrelationAnalyzer
 from .fresh_wallet_detector import FreshWalletDetector
 
-__all__ = ['EdgeDetector', 'PositionSizer', 'RiskManager', 'CorrelationAnalyzer', 'FreshWalletDetector']
+__all__ = ['EdgeDetector', 'trades_to_array', 'PositionSizer', 'RiskManager', 'CorrelationAnalyzer', 'FreshWalletDetector']
@@ -1,10 +1,30 @@
 """Edge detection logic for identifying opportunities."""
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime, timedelta, timezone
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Column layout for trades held as a NumPy structured array
+TRADE_DTYPE = np.dtype([('size', 'f8'), ('price', 'f8')])
+
+
+def trades_to_array(trades: List[Dict[str, Any]]) -> np.ndarray:
+    """Pack trade dictionaries into a structured array of size and price.
+    
+    Args:
+        trades: List of trade dictionaries
+        
+    Returns:
+        Structured array with TRADE_DTYPE, one row per trade
+    """
+    return np.fromiter(
+        ((float(trade.get('size', 0)), float(trade.get('price', 0))) for trade in trades),
+        dtype=TRADE_DTYPE,
+        count=len(trades)
+    )
+
 
 class EdgeDetector:
     """Detects edges and opportunities in markets."""
@@ -274,33 +294,39 @@ class EdgeDetector:
     
     def detect_unusual_trade_size(
         self,
-        trades: List[Dict[str, Any]],
+        trades: Union[List[Dict[str, Any]], np.ndarray],
         min_size_usd: float = 1000
     ) -> Optional[Dict[str, Any]]:
         """Detect unusually large trades.
         
         Args:
-            trades: List of recent trades
+            trades: List of recent trades, or a structured array from
+                trades_to_array (which carries no trader or timestamp)
             min_size_usd: Minimum size to flag as unusual
             
         Returns:
             Signal dictionary if unusual trades detected, None otherwise
         """
+        if isinstance(trades, np.ndarray):
+            records = None
+        else:
+            records = trades
+            trades = trades_to_array(trades)
+        
+        # Threshold all trades in one vectorized pass; only the matches
+        # are turned back into dictionaries
+        values = trades['size'] * trades['price']
         unusual_trades = []
         
-        for trade in trades:
-            size = float(trade.get('size', 0))
-            price = float(trade.get('price', 0))
-            trade_value = size * price
-            
-            if trade_value >= min_size_usd:
-                unusual_trades.append({
-                    'trader_address': trade.get('trader_address'),
-                    'size': size,
-                    'price': price,
-                    'value_usd': trade_value,
-                    'timestamp': trade.get('timestamp')
-                })
+        for i in np.flatnonzero(values >= min_size_usd):
+            trade = records[i] if records is not None else {}
+            unusual_trades.append({
+                'trader_address': trade.get('trader_address'),
+                'size': float(trades['size'][i]),
+                'price': float(trades['price'][i]),
+                'value_usd': float(values[i]),
+                'timestamp': trade.get('timestamp')
+            })
         
         if unusual_trades:
             return {
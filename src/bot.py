@@ -10,7 +10,7 @@ from src.logger_setup import setup_logger
 from src.database import Database
 from src.data_ingestion import PolymarketAPI, BlockchainMonitor, ExternalAPIs, TwitterMonitor
 from src.analysis import EdgeDetector, PositionSizer, RiskManager, CorrelationAnalyzer
-from src.notifications import TelegramNotifier, DiscordNotifier
+from src.notifications import TelegramNotifier, DiscordNotifier, notify_all
 
 
 class PolymarketBot:
@@ -143,26 +143,8 @@ class PolymarketBot:
             # 2. Get recent trades
             trades = self.polymarket.get_trades(market_id=market_id, limit=100)  # Increased for fresh wallet detection
             
-            # Store trades in database for tracking
-            for trade in trades:
-                try:
-                    trade_timestamp = trade.get('timestamp')
-                    if isinstance(trade_timestamp, str):
-                        from dateutil import parser
-                        trade_timestamp = parser.parse(trade_timestamp)
-                    elif trade_timestamp is None:
-                        trade_timestamp = datetime.now(timezone.utc)
-                    
-                    self.db.add_trade({
-                        'market_id': market_id,
-                        'trader_address': trade.get('trader_address', ''),
-                        'side': trade.get('side', 'buy'),
-                        'size': float(trade.get('size', 0)),
-                        'price': float(trade.get('price', 0)),
-                        'timestamp': trade_timestamp
-                    })
-                except Exception as e:
-                    self.logger.debug(f"Error storing trade: {e}")
+            # Store trades in database for tracking (one commit for the batch)
+            self._store_trades(market_id, trades)
             
             # Check for unusual trade sizes
             unusual_trades = self.edge_detector.detect_unusual_trade_size(
@@ -233,6 +215,42 @@ class PolymarketBot:
         
         return opportunities
     
+    def _store_trades(self, market_id: str, trades: List[Dict[str, Any]]) -> None:
+        """Store a market's trades in one transaction.
+        
+        Each trade is flushed under its own savepoint, so a bad row is
+        dropped on its own; a failure of the batch itself is logged and
+        never stops the market's analysis.
+        
+        Args:
+            market_id: Market the trades belong to
+            trades: Trades as returned by PolymarketAPI.get_trades
+        """
+        try:
+            with self.db.transaction() as session:
+                for trade in trades:
+                    try:
+                        trade_timestamp = trade.get('timestamp')
+                        if isinstance(trade_timestamp, str):
+                            from dateutil import parser
+                            trade_timestamp = parser.parse(trade_timestamp)
+                        elif trade_timestamp is None:
+                            trade_timestamp = datetime.now(timezone.utc)
+                        
+                        with session.begin_nested():
+                            self.db.add_trade({
+                                'market_id': market_id,
+                                'trader_address': trade.get('trader_address', ''),
+                                'side': trade.get('side', 'buy'),
+                                'size': float(trade.get('size', 0)),
+                                'price': float(trade.get('price', 0)),
+                                'timestamp': trade_timestamp
+                            }, session=session)
+                    except Exception as e:
+                        self.logger.debug(f"Error storing trade: {e}")
+        except Exception as e:
+            self.logger.warning(f"Error storing trades for {market_id}: {e}")
+    
     def _extract_keywords(self, question: str) -> List[str]:
         """Extract keywords from market question for Twitter search.
         
@@ -299,13 +317,8 @@ class PolymarketBot:
                 opp_id = self.db.flag_opportunity(opportunity_data)
                 self.logger.info(f"Flagged opportunity #{opp_id}: {opp['market_question'][:50]}...")
                 
-                # Send notifications
-                for notifier in self.notifiers:
-                    try:
-                        if isinstance(notifier, TelegramNotifier):
-                            notifier.notify_opportunity(opportunity_data)
-                    except Exception as e:
-                        self.logger.error(f"Failed to send notification: {e}")
+                # Send notifications on all channels concurrently
+                notify_all(opportunity_data, self.notifiers)
                 
             except Exception as e:
                 self.logger.error(f"Error processing opportunity: {e}", exc_info=True)
@@ -1,8 +1,10 @@
 """Configuration management for the bot."""
 import os
 import yaml
+from functools import cached_property
 from pathlib import Path
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Any, Mapping
 from dotenv import load_dotenv
 
 
@@ -85,10 +87,16 @@ class ConfigManager:
         
         return value
     
-    def get_all(self) -> Dict[str, Any]:
+    @cached_property
+    def _all(self) -> Mapping[str, Any]:
+        """Read-only view of the configuration, created once."""
+        return MappingProxyType(self.config)
+    
+    def get_all(self) -> Mapping[str, Any]:
         """Get all configuration.
         
         Returns:
-            Complete configuration dictionary
+            Read-only view of the complete configuration; use
+            dict(config.get_all()) for a copy that can be modified
         """
-        return self.config.copy()
+        return self._all
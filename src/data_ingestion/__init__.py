@@ -1,7 +1,7 @@
 """Data ingestion modules."""
-from .polymarket_api import PolymarketAPI
+from .polymarket_api import PolymarketAPI, CircuitBreakerError, get_shared_api
 from .blockchain import BlockchainMonitor
 from .external_apis import ExternalAPIs
 from .twitter_monitor import TwitterMonitor
 
-__all__ = ['PolymarketAPI', 'BlockchainMonitor', 'ExternalAPIs', 'TwitterMonitor']
+__all__ = ['PolymarketAPI', 'CircuitBreakerError', 'get_shared_api', 'BlockchainMonitor', 'ExternalAPIs', 'TwitterMonitor']
@@ -1,5 +1,4 @@
 """Blockchain monitoring for Polygon network."""
-from web3 import Web3
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 import logging
@@ -18,6 +17,8 @@ class BlockchainMonitor:
             rpc_url: Polygon RPC endpoint URL
             polygonscan_api_key: Optional PolygonScan API key for enhanced queries
         """
+        from web3 import Web3
+        
         self.w3 = Web3(Web3.HTTPProvider(rpc_url))
         self.polygonscan_api_key = polygonscan_api_key
         self.polygonscan_base = "https://api.polygonscan.com/api"
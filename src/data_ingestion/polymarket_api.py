@@ -1,13 +1,119 @@
 """Polymarket Gamma API client."""
 import requests
+from requests.adapters import HTTPAdapter
+import asyncio
+import sys
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Union
 from datetime import datetime, timedelta, timezone
+from contextlib import asynccontextmanager
+from functools import lru_cache
 import logging
 
+import msgspec
+import orjson
+import pybreaker
+from pybreaker import CircuitBreakerError
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+
+if TYPE_CHECKING:
+    import aiohttp
+
 logger = logging.getLogger(__name__)
 
 
+class _TradeAmount(msgspec.Struct, gc=False):
+    """Only the fields needed for volume aggregation."""
+    size: float = 0.0
+    price: float = 0.0
+
+
+class _TradePage(msgspec.Struct, gc=False):
+    data: List[_TradeAmount] = []
+
+
+# strict=False lets numeric strings ("12.5") coerce to float in C
+_TRADES_DECODER = msgspec.json.Decoder(
+    Union[List[_TradeAmount], _TradePage], strict=False
+)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Rate limiting (429) and server errors (5xx) are worth retrying."""
+    if isinstance(exc, requests.HTTPError):
+        status = exc.response.status_code if exc.response is not None else None
+    # aiohttp is imported lazily; if it isn't loaded, exc can't be one of its errors
+    elif 'aiohttp' in sys.modules and isinstance(exc, sys.modules['aiohttp'].ClientResponseError):
+        status = exc.status
+    else:
+        return False
+    return status is not None and (status == 429 or status >= 500)
+
+
+def _is_client_error(exc: BaseException) -> bool:
+    """HTTP errors that say nothing about API health (e.g. 404s)."""
+    return isinstance(exc, requests.HTTPError) and not _is_retryable(exc)
+
+
+def _with_retry(func):
+    """Retry func with exponential backoff on 429/5xx."""
+    return retry(
+        wait=wait_exponential(multiplier=0.5, max=10),
+        stop=stop_after_attempt(5),
+        retry=retry_if_exception(_is_retryable),
+        reraise=True
+    )(func)
+
+
+def _loads(content: bytes) -> Any:
+    """Decode a JSON response body."""
+    return orjson.loads(content)
+
+
+def _as_list(value: Any) -> List[Any]:
+    """Gamma encodes some list fields as JSON strings; normalize to a list."""
+    if isinstance(value, str):
+        try:
+            value = _loads(value)
+        except ValueError:
+            return []
+    return value if isinstance(value, list) else []
+
+
+def _extract_prices(market: Dict[str, Any]) -> Dict[str, float]:
+    """Map outcome to price from a market record.
+    
+    Uses 'tokens' when present, otherwise the 'outcomes'/'outcomePrices'
+    pair returned by the /markets listing.
+    """
+    prices = {}
+    
+    if 'tokens' in market:
+        for token in market['tokens']:
+            outcome = token.get('outcome', '')
+            price = token.get('price', 0.0)
+            prices[outcome] = float(price)
+    elif 'outcomePrices' in market:
+        outcomes = _as_list(market.get('outcomes'))
+        for outcome, price in zip(outcomes, _as_list(market['outcomePrices'])):
+            prices[outcome] = float(price)
+    
+    return prices
+
+
+@asynccontextmanager
+async def _client_session(session: Optional['aiohttp.ClientSession'] = None):
+    """Yield the given aiohttp session, or a temporary one when None."""
+    if session is not None:
+        yield session
+        return
+    
+    import aiohttp
+    async with aiohttp.ClientSession() as temporary:
+        yield temporary
+
+
 class PolymarketAPI:
     """Client for Polymarket Gamma API."""
     
@@ -22,35 +128,148 @@ class PolymarketAPI:
         self.rate_limit = rate_limit
         self.last_request_time = 0
         self.min_interval = 60.0 / rate_limit
+        self._rate_lock = threading.Lock()
+        
+        # Keep-alive connection pool shared by all requests (and threads)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Stop calling the API for a while once it keeps failing after retries
+        self.breaker = pybreaker.CircuitBreaker(
+            fail_max=5,
+            reset_timeout=30,
+            exclude=[_is_client_error]
+        )
+    
+    def _reserve_request_slot(self) -> float:
+        """Reserve the next free request slot.
+        
+        Returns:
+            Seconds to wait before the slot starts (may be negative)
+        """
+        with self._rate_lock:
+            now = time.time()
+            wait = self.last_request_time + self.min_interval - now
+            self.last_request_time = now + max(wait, 0.0)
+        return wait
     
     def _rate_limit_wait(self):
-        """Wait if necessary to respect rate limits."""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_interval:
-            time.sleep(self.min_interval - elapsed)
-        self.last_request_time = time.time()
+        """Wait if necessary to respect rate limits.
+        
+        Safe to call from several threads: each caller reserves the next
+        free request slot under a lock, then sleeps until its slot, outside the lock.
+        """
+        wait = self._reserve_request_slot()
+        if wait > 0:
+            time.sleep(wait)
     
-    def _request(self, endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
-        """Make API request with rate limiting and error handling.
+    async def _arate_limit_wait(self):
+        """Async variant of _rate_limit_wait; shares the same slot schedule."""
+        wait = self._reserve_request_slot()
+        if wait > 0:
+            await asyncio.sleep(wait)
+    
+    def _raw_request(self, endpoint: str, params: Optional[Dict] = None) -> bytes:
+        """Make API request through the circuit breaker.
         
         Args:
             endpoint: API endpoint (without base URL)
             params: Query parameters
             
         Returns:
-            JSON response data
+            Raw response body
+            
+        Raises:
+            CircuitBreakerError: If the API has failed repeatedly and the
+                breaker is open
+        """
+        return self.breaker.call(self._fetch, endpoint, params)
+    
+    @_with_retry
+    def _fetch(self, endpoint: str, params: Optional[Dict] = None) -> bytes:
+        """Make API request with rate limiting, retries and error handling.
+        
+        Args:
+            endpoint: API endpoint (without base URL)
+            params: Query parameters
+            
+        Returns:
+            Raw response body
         """
         self._rate_limit_wait()
         url = f"{self.BASE_URL}{endpoint}"
         
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = self.session.get(url, params=params, timeout=30)
             response.raise_for_status()
-            return response.json()
+            return response.content
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed: {endpoint} - {e}")
             raise
     
+    def _request(self, endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
+        """Make API request and decode the JSON response.
+        
+        Args:
+            endpoint: API endpoint (without base URL)
+            params: Query parameters
+            
+        Returns:
+            JSON response data
+        """
+        return self._decode(endpoint, self._raw_request(endpoint, params=params))
+    
+    @staticmethod
+    def _decode(endpoint: str, content: bytes) -> Any:
+        """Decode a JSON response body, logging invalid payloads."""
+        try:
+            return _loads(content)
+        except ValueError as e:
+            logger.error(f"Invalid JSON response: {endpoint} - {e}")
+            raise
+    
+    @_with_retry
+    async def _arequest(
+        self,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        session: Optional['aiohttp.ClientSession'] = None
+    ) -> Dict[str, Any]:
+        """Async variant of _request using aiohttp.
+        
+        Retried like _fetch; the circuit breaker only guards synchronous
+        calls, since pybreaker cannot wrap coroutines.
+        
+        Args:
+            endpoint: API endpoint (without base URL)
+            params: Query parameters
+            session: Optional aiohttp session to reuse; a temporary one is
+                opened when omitted
+            
+        Returns:
+            JSON response data
+        """
+        import aiohttp
+        
+        await self._arate_limit_wait()
+        url = f"{self.BASE_URL}{endpoint}"
+        
+        async with _client_session(session) as client:
+            try:
+                async with client.get(url, params=params, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                    response.raise_for_status()
+                    content = await response.read()
+            except aiohttp.ClientError as e:
+                logger.error(f"API request failed: {endpoint} - {e}")
+                raise
+            except asyncio.TimeoutError:
+                logger.error(f"API request timed out: {endpoint}")
+                raise
+        
+        return self._decode(endpoint, content)
+    
     def get_markets(
         self,
         category: Optional[str] = None,
@@ -67,15 +286,46 @@ class PolymarketAPI:
         Returns:
             List of market data dictionaries
         """
+        params = self._markets_params(category, active, limit)
+        data = self._request('/markets', params=params)
+        return data if isinstance(data, list) else data.get('data', [])
+    
+    async def aget_markets(
+        self,
+        category: Optional[str] = None,
+        active: bool = True,
+        limit: int = 100,
+        session: Optional['aiohttp.ClientSession'] = None
+    ) -> List[Dict[str, Any]]:
+        """Async variant of get_markets.
+        
+        Args:
+            category: Market category filter (e.g., 'politics')
+            active: Only return active markets
+            limit: Maximum number of results
+            session: Optional aiohttp session to reuse
+            
+        Returns:
+            List of market data dictionaries
+        """
+        params = self._markets_params(category, active, limit)
+        data = await self._arequest('/markets', params=params, session=session)
+        return data if isinstance(data, list) else data.get('data', [])
+    
+    @staticmethod
+    def _markets_params(
+        category: Optional[str],
+        active: bool,
+        limit: int
+    ) -> Dict[str, Any]:
+        """Build query parameters for the /markets endpoint."""
         params = {
             'active': str(active).lower(),
             'limit': limit
         }
         if category:
             params['category'] = category
-        
-        data = self._request('/markets', params=params)
-        return data if isinstance(data, list) else data.get('data', [])
+        return params
     
     def get_market(self, market_id: str) -> Dict[str, Any]:
         """Get specific market details.
@@ -88,6 +338,22 @@ class PolymarketAPI:
         """
         return self._request(f'/markets/{market_id}')
     
+    async def aget_market(
+        self,
+        market_id: str,
+        session: Optional['aiohttp.ClientSession'] = None
+    ) -> Dict[str, Any]:
+        """Async variant of get_market.
+        
+        Args:
+            market_id: Polymarket market ID
+            session: Optional aiohttp session to reuse
+            
+        Returns:
+            Market data dictionary
+        """
+        return await self._arequest(f'/markets/{market_id}', session=session)
+    
     def get_trades(
         self,
         market_id: Optional[str] = None,
@@ -104,14 +370,45 @@ class PolymarketAPI:
         Returns:
             List of trade data dictionaries
         """
+        params = self._trades_params(market_id, limit, start_time)
+        data = self._request('/trades', params=params)
+        return data if isinstance(data, list) else data.get('data', [])
+    
+    async def aget_trades(
+        self,
+        market_id: Optional[str] = None,
+        limit: int = 100,
+        start_time: Optional[datetime] = None,
+        session: Optional['aiohttp.ClientSession'] = None
+    ) -> List[Dict[str, Any]]:
+        """Async variant of get_trades.
+        
+        Args:
+            market_id: Filter by market ID
+            limit: Maximum number of results
+            start_time: Only return trades after this time
+            session: Optional aiohttp session to reuse
+            
+        Returns:
+            List of trade data dictionaries
+        """
+        params = self._trades_params(market_id, limit, start_time)
+        data = await self._arequest('/trades', params=params, session=session)
+        return data if isinstance(data, list) else data.get('data', [])
+    
+    @staticmethod
+    def _trades_params(
+        market_id: Optional[str],
+        limit: int,
+        start_time: Optional[datetime]
+    ) -> Dict[str, Any]:
+        """Build query parameters for the /trades endpoint."""
         params = {'limit': limit}
         if market_id:
             params['market'] = market_id
         if start_time:
             params['startTime'] = int(start_time.timestamp())
-        
-        data = self._request('/trades', params=params)
-        return data if isinstance(data, list) else data.get('data', [])
+        return params
     
     def get_orderbook(self, market_id: str) -> Dict[str, Any]:
         """Get order book for a market.
@@ -145,6 +442,31 @@ class PolymarketAPI:
         
         return prices
     
+    def get_markets_with_prices(
+        self,
+        category: Optional[str] = None,
+        active: bool = True,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Get markets with current outcome prices in a single request.
+        
+        The /markets listing already embeds outcome prices, so this avoids a
+        follow-up get_market_prices call per market.
+        
+        Args:
+            category: Market category filter (e.g., 'politics')
+            active: Only return active markets
+            limit: Maximum number of results
+            
+        Returns:
+            List of market data dictionaries, each with a 'prices' dictionary
+            mapping outcome to probability (empty if unavailable)
+        """
+        markets = self.get_markets(category=category, active=active, limit=limit)
+        for market in markets:
+            market['prices'] = _extract_prices(market)
+        return markets
+    
     def get_market_volume(self, market_id: str, hours: int = 24) -> float:
         """Get market volume over specified hours.
         
@@ -156,13 +478,28 @@ class PolymarketAPI:
             Total volume in USD
         """
         start_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-        trades = self.get_trades(market_id=market_id, start_time=start_time)
         
-        total_volume = 0.0
-        for trade in trades:
-            # Calculate volume: size * price
-            size = float(trade.get('size', 0))
-            price = float(trade.get('price', 0))
-            total_volume += size * price
+        # Decode straight into typed structs, skipping per-trade dicts
+        params = self._trades_params(market_id, 100, start_time)
+        try:
+            page = _TRADES_DECODER.decode(self._raw_request('/trades', params=params))
+        except msgspec.DecodeError as e:
+            logger.error(f"Invalid trades response: /trades - {e}")
+            raise
+        trades = page if isinstance(page, list) else page.data
+        
+        # Volume per trade is size * price
+        return sum((trade.size * trade.price for trade in trades), 0.0)
+
+
+@lru_cache(maxsize=None)
+def get_shared_api(rate_limit: int = 60) -> PolymarketAPI:
+    """Get a process-wide PolymarketAPI so callers share one connection pool.
+    
+    Args:
+        rate_limit: Requests per minute
         
-        return total_volume
+    Returns:
+        Shared PolymarketAPI instance for this rate limit
+    """
+    return PolymarketAPI(rate_limit=rate_limit)
@@ -1,12 +1,18 @@
 """Twitter monitoring for early signals."""
-import tweepy
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=256)
+def _keyword_queries(keywords: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Build the search query for each keyword (cached across scans)."""
+    return tuple(f"{keyword} -is:retweet lang:en" for keyword in keywords)
+
+
 class TwitterMonitor:
     """Monitor Twitter for market-related signals."""
     
@@ -21,15 +27,24 @@ class TwitterMonitor:
         
         if bearer_token:
             try:
+                import tweepy
+                
                 self.client = tweepy.Client(bearer_token=bearer_token, wait_on_rate_limit=True)
             except Exception as e:
                 logger.error(f"Failed to initialize Twitter client: {e}")
     
+    @staticmethod
+    def _start_time_iso(hours_back: int) -> str:
+        """Format the search window start as the RFC 3339 string the API expects."""
+        start_time = datetime.now(timezone.utc) - timedelta(hours=hours_back)
+        return start_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+    
     def search_tweets(
         self,
         query: str,
         max_results: int = 100,
-        hours_back: int = 1
+        hours_back: int = 1,
+        start_time_iso: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Search for tweets matching query.
         
@@ -37,6 +52,7 @@ class TwitterMonitor:
             query: Search query (supports Twitter search syntax)
             max_results: Maximum number of results (max 100)
             hours_back: How many hours back to search
+            start_time_iso: Precomputed RFC 3339 start time; overrides hours_back
             
         Returns:
             List of tweet data dictionaries
@@ -46,13 +62,13 @@ class TwitterMonitor:
             return []
         
         try:
-            start_time = datetime.now(timezone.utc) - timedelta(hours=hours_back)
-            start_time_str = start_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+            if start_time_iso is None:
+                start_time_iso = self._start_time_iso(hours_back)
             
             tweets = self.client.search_recent_tweets(
                 query=query,
                 max_results=min(max_results, 100),
-                start_time=start_time_str,
+                start_time=start_time_iso,
                 tweet_fields=['created_at', 'public_metrics', 'author_id']
             )
             
@@ -90,9 +106,13 @@ class TwitterMonitor:
         """
         results = {}
         
-        for keyword in keywords:
-            query = f"{keyword} -is:retweet lang:en"
-            tweets = self.search_tweets(query, max_results=100, hours_back=hours_back)
+        queries = _keyword_queries(tuple(keywords))
+        
+        # One shared window so every keyword is searched over the same period
+        start_time_iso = self._start_time_iso(hours_back)
+        
+        for keyword, query in zip(keywords, queries):
+            tweets = self.search_tweets(query, max_results=100, start_time_iso=start_time_iso)
             results[keyword] = tweets
         
         return results
@@ -1,15 +1,27 @@
 """Database layer for storing historical data and trade journal."""
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, Index, func
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from datetime import datetime, timezone
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import StaticPool
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-import json
+from typing import Optional, List, Dict, Any, Iterable, Sequence
+
+import orjson
 
 Base = declarative_base()
 
 
+def _dumps_metadata(metadata: Dict[str, Any]) -> str:
+    """Serialize opportunity metadata to a key-sorted JSON string."""
+    return orjson.dumps(
+        metadata,
+        default=str,
+        option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    ).decode('utf-8')
+
+
 class Market(Base):
     """Market data table."""
     __tablename__ = 'markets'
@@ -37,6 +49,10 @@ class Trade(Base):
     price = Column(Float)
     timestamp = Column(DateTime, nullable=False, index=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        Index('ix_trades_market_id_timestamp', 'market_id', 'timestamp'),
+    )
 
 
 class Wallet(Base):
@@ -89,23 +105,74 @@ class Database:
         """Initialize database connection.
         
         Args:
-            db_path: Path to SQLite database file
+            db_path: Path to SQLite database file, or ':memory:' for a
+                throwaway in-memory database (e.g. in tests)
         """
-        # Create data directory if it doesn't exist
-        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        if db_path == ':memory:':
+            # Share one connection so every session and thread sees the same database
+            self.engine = create_engine(
+                'sqlite://',
+                echo=False,
+                poolclass=StaticPool,
+                connect_args={'check_same_thread': False}
+            )
+        else:
+            # Create data directory if it doesn't exist
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self.engine = create_engine(f'sqlite:///{db_path}', echo=False)
         
-        self.engine = create_engine(f'sqlite:///{db_path}', echo=False)
         Base.metadata.create_all(self.engine)
-        self.Session = sessionmaker(bind=self.engine)
+        # create_all skips indexes on tables that already exist
+        for index in Trade.__table__.indexes:
+            index.create(self.engine, checkfirst=True)
+        self._session_factory = sessionmaker(bind=self.engine, expire_on_commit=False)
+        # Thread-local session shared by writes inside transaction()
+        self.Session = scoped_session(self._session_factory)
+    
+    def __enter__(self) -> 'Database':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Close pooled connections so the database file is released."""
+        self.Session.remove()
+        self.engine.dispose()
     
     def get_session(self):
-        """Get a database session."""
-        return self.Session()
+        """Get a new independent database session (caller must close it)."""
+        return self._session_factory()
     
-    def add_market(self, market_data: Dict[str, Any]) -> None:
-        """Add or update market data."""
-        session = self.get_session()
+    @contextmanager
+    def transaction(self):
+        """Run several writes in one transaction on the thread's session.
+        
+        Commits on success and rolls back on error. Nested blocks (including
+        the add_* helpers called inside one) join the enclosing transaction,
+        so only the outermost block commits.
+        
+        Yields:
+            The thread-local session
+        """
+        session = self.Session()
+        if session.in_transaction():
+            yield session
+            return
+        
+        session.begin()
         try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            self.Session.remove()
+    
+    def add_market(self, market_data: Dict[str, Any], session=None) -> None:
+        """Add or update market data."""
+        with self._write_session(session) as session:
             market = session.query(Market).filter_by(id=market_data['id']).first()
             if market:
                 for key, value in market_data.items():
@@ -115,48 +182,55 @@ class Database:
             else:
                 market = Market(**market_data)
                 session.add(market)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
     
-    def add_trade(self, trade_data: Dict[str, Any]) -> None:
+    def add_trade(self, trade_data: Dict[str, Any], session=None) -> None:
         """Add trade data."""
-        session = self.get_session()
-        try:
-            trade = Trade(**trade_data)
-            session.add(trade)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+        with self._write_session(session) as session:
+            session.add(Trade(**trade_data))
     
-    def add_historical_probability(self, market_id: str, probability: float, volume_24h: float) -> None:
+    def add_historical_probability(
+        self,
+        market_id: str,
+        probability: float,
+        volume_24h: float,
+        session=None
+    ) -> None:
         """Add historical probability snapshot."""
-        session = self.get_session()
-        try:
-            hist = HistoricalProbability(
+        with self._write_session(session) as session:
+            session.add(HistoricalProbability(
                 market_id=market_id,
                 probability=probability,
                 volume_24h=volume_24h
-            )
-            session.add(hist)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+            ))
+    
+    def add_historical_probabilities(
+        self,
+        market_id: str,
+        rows: Iterable[Sequence[Any]],
+        session=None
+    ) -> None:
+        """Add several historical probability snapshots in one executemany.
+        
+        Args:
+            market_id: Market ID
+            rows: (probability, volume_24h) tuples, optionally with a third
+                timestamp element (defaults to now)
+            session: Optional session to batch with other writes
+        """
+        mappings = []
+        for row in rows:
+            mapping = {'market_id': market_id, 'probability': row[0], 'volume_24h': row[1]}
+            if len(row) > 2 and row[2] is not None:
+                mapping['timestamp'] = row[2]
+            mappings.append(mapping)
+        
+        with self._write_session(session) as session:
+            session.bulk_insert_mappings(HistoricalProbability, mappings)
     
     def get_market_volume_history(self, market_id: str, hours: int = 24) -> List[Dict[str, Any]]:
         """Get volume history for a market."""
         session = self.get_session()
         try:
-            from datetime import timedelta
             cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
             results = session.query(HistoricalProbability).filter(
                 HistoricalProbability.market_id == market_id,
@@ -174,25 +248,43 @@ class Database:
         finally:
             session.close()
     
-    def flag_opportunity(self, opportunity_data: Dict[str, Any]) -> int:
-        """Flag a new opportunity."""
+    def get_market_volume(self, market_id: str, hours: int = 24) -> float:
+        """Get traded volume (size * price) for a market from stored trades."""
         session = self.get_session()
         try:
-            # Convert metadata dict to JSON string and rename key
-            db_data = opportunity_data.copy()
-            if 'metadata' in db_data:
-                if isinstance(db_data['metadata'], dict):
-                    db_data['metadata_json'] = json.dumps(db_data['metadata'])
-                else:
-                    db_data['metadata_json'] = db_data['metadata']
-                del db_data['metadata']
-            
+            cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+            volume = session.query(
+                func.coalesce(func.sum(Trade.size * Trade.price), 0.0)
+            ).filter(
+                Trade.market_id == market_id,
+                Trade.timestamp >= cutoff
+            ).scalar()
+            return float(volume)
+        finally:
+            session.close()
+    
+    def flag_opportunity(self, opportunity_data: Dict[str, Any], session=None) -> int:
+        """Flag a new opportunity."""
+        # Convert metadata dict to JSON string and rename key
+        db_data = opportunity_data.copy()
+        metadata = db_data.pop('metadata', None)
+        if metadata is not None:
+            if isinstance(metadata, dict):
+                db_data['metadata_json'] = _dumps_metadata(metadata)
+            else:
+                db_data['metadata_json'] = metadata
+        
+        with self._write_session(session) as session:
             opportunity = FlaggedOpportunity(**db_data)
             session.add(opportunity)
-            session.commit()
+            session.flush()
             return opportunity.id
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+    
+    @contextmanager
+    def _write_session(self, session=None):
+        """Use the caller's session if given, otherwise a transaction()."""
+        if session is not None:
+            yield session
+        else:
+            with self.transaction() as session:
+                yield session
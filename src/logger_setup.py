@@ -1,6 +1,5 @@
 """Logging configuration for the bot."""
 import logging
-import colorlog
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
@@ -31,21 +30,32 @@ def setup_logger(
     log_path = Path(log_dir)
     log_path.mkdir(exist_ok=True)
     
-    # Console handler with colors
-    console_handler = colorlog.StreamHandler()
-    console_handler.setLevel(getattr(logging, log_level.upper()))
+    # Console handler with colors (falls back to plain output without colorlog)
+    try:
+        import colorlog
+    except ImportError:
+        colorlog = None
     
-    console_formatter = colorlog.ColoredFormatter(
-        '%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S',
-        log_colors={
-            'DEBUG': 'cyan',
-            'INFO': 'green',
-            'WARNING': 'yellow',
-            'ERROR': 'red',
-            'CRITICAL': 'red,bg_white',
-        }
-    )
+    if colorlog is not None:
+        console_handler = colorlog.StreamHandler()
+        console_formatter = colorlog.ColoredFormatter(
+            '%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S',
+            log_colors={
+                'DEBUG': 'cyan',
+                'INFO': 'green',
+                'WARNING': 'yellow',
+                'ERROR': 'red',
+                'CRITICAL': 'red,bg_white',
+            }
+        )
+    else:
+        console_handler = logging.StreamHandler()
+        console_formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+    console_handler.setLevel(getattr(logging, log_level.upper()))
     console_handler.setFormatter(console_formatter)
     logger.addHandler(console_handler)
     
@@ -1,5 +1,61 @@
-"""Notification modules."""
-from .telegram_notifier import TelegramNotifier
-from .discord_notifier import DiscordNotifier
+"""Notification modules.
 
-__all__ = ['TelegramNotifier', 'DiscordNotifier']
+Notifier classes are imported lazily (PEP 562) so that importing this package
+does not pull in python-telegram-bot or discord.py until a notifier is used.
+"""
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence
+import asyncio
+import logging
+
+if TYPE_CHECKING:
+    from .telegram_notifier import TelegramNotifier
+    from .discord_notifier import DiscordNotifier
+
+__all__ = ['TelegramNotifier', 'DiscordNotifier', 'notify_all', 'notify_all_async']
+
+logger = logging.getLogger(__name__)
+
+
+def __getattr__(name):
+    if name == 'TelegramNotifier':
+        from .telegram_notifier import TelegramNotifier
+        return TelegramNotifier
+    if name == 'DiscordNotifier':
+        from .discord_notifier import DiscordNotifier
+        return DiscordNotifier
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def notify_all_async(opportunity: Dict[str, Any], notifiers: Sequence[Any]) -> List[bool]:
+    """Send an opportunity through all notifiers concurrently.
+    
+    A failing notifier is logged and reported as False so it does not
+    block delivery on the other channels.
+    
+    Args:
+        opportunity: Opportunity dictionary
+        notifiers: Notifier instances exposing notify_opportunity_async
+        
+    Returns:
+        Per-notifier success flags, in the order given
+    """
+    results = await asyncio.gather(
+        *(notifier.notify_opportunity_async(opportunity) for notifier in notifiers),
+        return_exceptions=True
+    )
+    
+    sent = []
+    for notifier, result in zip(notifiers, results):
+        if isinstance(result, BaseException):
+            logger.error(f"{type(notifier).__name__} failed to send notification: {result}")
+            sent.append(False)
+        else:
+            sent.append(bool(result))
+    return sent
+
+
+def notify_all(opportunity: Dict[str, Any], notifiers: Sequence[Any]) -> List[bool]:
+    """Synchronous wrapper for notify_all_async."""
+    if not notifiers:
+        return []
+    return asyncio.run(notify_all_async(opportunity, notifiers))
@@ -1,9 +1,12 @@
 """Discord notification handler."""
-import discord
-from discord import Embed
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, Optional
 import logging
 
+from .formatting import signal_label
+
+if TYPE_CHECKING:
+    from discord import Embed
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,13 +25,15 @@ class DiscordNotifier:
         self.client = None
         
         try:
+            import discord
+            
             intents = discord.Intents.default()
             intents.message_content = True
             self.client = discord.Client(intents=intents)
         except Exception as e:
             logger.error(f"Failed to initialize Discord client: {e}")
     
-    async def send_message(self, content: str, embed: Optional[Embed] = None) -> bool:
+    async def send_message(self, content: str, embed: Optional['Embed'] = None) -> bool:
         """Send a message to Discord channel.
         
         Args:
@@ -50,7 +55,7 @@ class DiscordNotifier:
             logger.error(f"Failed to send Discord message: {e}")
             return False
     
-    def create_opportunity_embed(self, opportunity: Dict[str, Any]) -> Embed:
+    def create_opportunity_embed(self, opportunity: Dict[str, Any]) -> 'Embed':
         """Create a Discord embed for an opportunity.
         
         Args:
@@ -59,6 +64,8 @@ class DiscordNotifier:
         Returns:
             Discord Embed object
         """
+        from discord import Embed
+        
         market_id = opportunity.get('market_id', 'N/A')
         market_question = opportunity.get('market_question', 'Unknown Market')
         signal_type = opportunity.get('signal_type', 'unknown')
@@ -73,16 +80,17 @@ class DiscordNotifier:
             color=0x00ff00 if ev > 0 else 0xff0000
         )
         
-        embed.add_field(name="Signal Type", value=signal_type.replace('_', ' ').title(), inline=True)
-        embed.add_field(name="Current Probability", value=f"{current_prob:.1%}", inline=True)
-        embed.add_field(name="Expected Value", value=f"${ev:.2f}", inline=True)
-        embed.add_field(name="Suggested Size", value=f"${suggested_size:.2f}", inline=True)
-        embed.add_field(name="Rationale", value=rationale[:1024], inline=False)
-        embed.add_field(
-            name="Link",
-            value=f"[View on Polymarket](https://polymarket.com/event/{market_id})",
-            inline=False
+        fields = (
+            ("Signal Type", signal_label(signal_type), True),
+            ("Current Probability", f"{current_prob:.1%}", True),
+            ("Expected Value", f"${ev:.2f}", True),
+            ("Suggested Size", f"${suggested_size:.2f}", True),
+            ("Rationale", rationale[:1024], False),
+            ("Link", f"[View on Polymarket](https://polymarket.com/event/{market_id})", False),
         )
+        add_field = embed.add_field
+        for name, value, inline in fields:
+            add_field(name=name, value=value, inline=inline)
         
         return embed
     
@@ -98,6 +106,10 @@ class DiscordNotifier:
         embed = self.create_opportunity_embed(opportunity)
         return await self.send_message("", embed=embed)
     
+    async def notify_opportunity_async(self, opportunity: Dict[str, Any]) -> bool:
+        """Alias of notify_opportunity, matching the TelegramNotifier interface."""
+        return await self.notify_opportunity(opportunity)
+    
     async def send_alert(self, title: str, message: str) -> bool:
         """Send a general alert.
         
@@ -108,5 +120,7 @@ class DiscordNotifier:
         Returns:
             True if sent successfully
         """
+        from discord import Embed
+        
         embed = Embed(title=title, description=message, color=0xffaa00)
         return await self.send_message("", embed=embed)
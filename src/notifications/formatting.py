@@ -0,0 +1,15 @@
+"""Shared formatting helpers for notifications."""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=64)
+def signal_label(signal_type: str) -> str:
+    """Convert a signal type (e.g. 'volume_spike') to a display label.
+    
+    Args:
+        signal_type: Signal type identifier
+        
+    Returns:
+        Title-cased label, e.g. 'Volume Spike'
+    """
+    return signal_type.replace('_', ' ').title()
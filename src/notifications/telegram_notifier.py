@@ -1,12 +1,23 @@
 """Telegram notification handler."""
-from telegram import Bot
-from telegram.error import TelegramError
 from typing import Dict, Any, Optional
 import logging
 import asyncio
 
+from .formatting import signal_label
+
 logger = logging.getLogger(__name__)
 
+_OPPORTUNITY_TEMPLATE = (
+    "🚨 <b>Flagged Opportunity</b>\n\n"
+    "<b>Market:</b> {market_question}\n"
+    "<b>Signal:</b> {signal}\n"
+    "<b>Current Probability:</b> {current_prob:.1%}\n"
+    "<b>Expected Value:</b> ${ev:.2f}\n"
+    "<b>Suggested Size:</b> ${suggested_size:.2f}\n\n"
+    "<b>Rationale:</b>\n{rationale}\n\n"
+    "<a href='https://polymarket.com/event/{market_id}'>View on Polymarket</a>"
+)
+
 
 class TelegramNotifier:
     """Send notifications via Telegram."""
@@ -23,6 +34,7 @@ class TelegramNotifier:
         self.bot = None
         
         try:
+            from telegram import Bot
             self.bot = Bot(token=bot_token)
         except Exception as e:
             logger.error(f"Failed to initialize Telegram bot: {e}")
@@ -55,6 +67,21 @@ class TelegramNotifier:
             logger.error(f"Failed to send Telegram message: {e}")
             return False
     
+    async def send_message_async(self, message: str) -> bool:
+        """Send a text message from a running event loop.
+        
+        Args:
+            message: Message text
+            
+        Returns:
+            True if sent successfully
+        """
+        if not self.bot:
+            logger.warning("Telegram bot not initialized")
+            return False
+        
+        return await self._send_message_async(message)
+    
     async def _send_message_async(self, message: str) -> bool:
         """Async method to send message.
         
@@ -64,6 +91,8 @@ class TelegramNotifier:
         Returns:
             True if sent successfully
         """
+        from telegram.error import TelegramError
+        
         try:
             await self.bot.send_message(chat_id=self.chat_id, text=message, parse_mode='HTML')
             return True
@@ -115,14 +144,15 @@ class TelegramNotifier:
             message += f"<a href='https://polymarket.com/event/{market_id}'>View on Polymarket</a>\n"
             message += f"<a href='https://polygonscan.com/address/{wallet}'>View Wallet on PolygonScan</a>"
         else:
-            message = f"🚨 <b>Flagged Opportunity</b>\n\n"
-            message += f"<b>Market:</b> {market_question}\n"
-            message += f"<b>Signal:</b> {signal_type.replace('_', ' ').title()}\n"
-            message += f"<b>Current Probability:</b> {current_prob:.1%}\n"
-            message += f"<b>Expected Value:</b> ${ev:.2f}\n"
-            message += f"<b>Suggested Size:</b> ${suggested_size:.2f}\n\n"
-            message += f"<b>Rationale:</b>\n{rationale}\n\n"
-            message += f"<a href='https://polymarket.com/event/{market_id}'>View on Polymarket</a>"
+            message = _OPPORTUNITY_TEMPLATE.format_map({
+                'market_id': market_id,
+                'market_question': market_question,
+                'signal': signal_label(signal_type),
+                'current_prob': current_prob,
+                'ev': ev,
+                'suggested_size': suggested_size,
+                'rationale': rationale,
+            })
         
         return message
     
@@ -138,6 +168,18 @@ class TelegramNotifier:
         message = self.format_opportunity_message(opportunity)
         return self.send_message(message)
     
+    async def notify_opportunity_async(self, opportunity: Dict[str, Any]) -> bool:
+        """Notify about a flagged opportunity from a running event loop.
+        
+        Args:
+            opportunity: Opportunity dictionary
+            
+        Returns:
+            True if sent successfully
+        """
+        message = self.format_opportunity_message(opportunity)
+        return await self.send_message_async(message)
+    
     def send_alert(self, title: str, message: str) -> bool:
         """Send a general alert.
         
@@ -1,20 +1,56 @@
 #!/usr/bin/env python
 """Test Polymarket API directly."""
-from src.data_ingestion import PolymarketAPI
-import json
+from src.data_ingestion import get_shared_api
+import asyncio
+import time
 
-api = PolymarketAPI()
 
-print("=== Testing Polymarket API ===\n")
+def timed_call(label, func, *args):
+    """Call func(*args), printing and returning how long it took in seconds."""
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"   {label}: {elapsed:.3f}s")
+    return elapsed
 
-# Get markets
-markets = api.get_markets(category='politics', active=True, limit=5)
-print(f"Fetched {len(markets)} markets\n")
 
-if markets:
+def fetch_orderbook(api, market_id):
+    """Fetch one order book, reporting (not raising) failures."""
+    try:
+        api.get_orderbook(market_id)
+    except Exception as e:
+        print(f"   Order book unavailable for {market_id}: {e}")
+
+
+async def fetch_orderbooks(api, market_ids):
+    """Fetch order books concurrently.
+    
+    Returns:
+        Total elapsed seconds for the whole fan-out
+    """
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        asyncio.to_thread(fetch_orderbook, api, market_id) for market_id in market_ids
+    ))
+    return time.perf_counter() - start
+
+
+def main():
+    # High enough that the client's request spacing (60s / rate_limit)
+    # doesn't serialize the order book fan-out timed below
+    api = get_shared_api(rate_limit=3000)
+    
+    print("=== Testing Polymarket API ===\n")
+    
+    # Get markets
+    markets = api.get_markets(category='politics', active=True, limit=5)
+    print(f"Fetched {len(markets)} markets\n")
+    
+    if not markets:
+        return
+    
     print("Sample market structure:")
-    sample = markets[0]
-    print(json.dumps(sample, indent=2, default=str)[:500])
+    print(repr(markets[0])[:500])
     print("\n...")
     
     print("\n=== Market Details ===")
@@ -25,3 +61,21 @@ if markets:
         print(f"   Volume: {m.get('volume', 'N/A')}")
         print(f"   Liquidity: {m.get('liquidity', 'N/A')}")
         print(f"   Active: {m.get('active', 'N/A')}")
+    
+    print("\n=== Timing ===")
+    market_id = markets[0]['id']
+    timed_call("get_market (cold)", api.get_market, market_id)
+    timed_call("get_market (warm)", api.get_market, market_id)
+    
+    market_ids = [m['id'] for m in markets]
+    # Untimed first fan-out opens one pooled keep-alive connection per
+    # concurrent call, so the timed runs below compare like with like
+    asyncio.run(fetch_orderbooks(api, market_ids))
+    baseline = timed_call("get_orderbook (single)", fetch_orderbook, api, market_ids[0])
+    elapsed = asyncio.run(fetch_orderbooks(api, market_ids))
+    print(f"   {len(market_ids)} order books concurrently: {elapsed:.3f}s (single call {baseline:.3f}s)")
+    assert elapsed <= baseline * 1.5, "Order book fan-out is not running concurrently"
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,23 @@
 """Test script to verify bot can detect opportunities with lowered thresholds."""
 import sys
 import os
+import asyncio
+from itertools import islice
 from pathlib import Path
 
+import aiohttp
+import msgspec
+import numpy as np
+import pytest
+import requests
+
 # Add src to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.config_manager import ConfigManager
 from src.logger_setup import setup_logger
 from src.database import Database
-from src.data_ingestion import PolymarketAPI
+from src.data_ingestion import CircuitBreakerError, get_shared_api
 from src.analysis import EdgeDetector
 from src.analysis import PositionSizer
 from src.analysis import RiskManager
@@ -28,7 +36,7 @@ def test_detection():
     logger = setup_logger('test_bot', 'INFO')
     
     # Temporarily lower thresholds for testing
-    test_config = config.get_all()
+    test_config = dict(config.get_all())
     test_config['notification_threshold_ev'] = 0.01  # Lower from 0.05
     test_config['volume_spike_multiplier'] = 2.0  # Lower from 4.0
     test_config['divergence_threshold_pct'] = 5.0  # Lower from 12.0
@@ -43,152 +51,203 @@ def test_detection():
     print()
     
     # Initialize components
-    db = Database("data/test_bot.db")
-    polymarket = PolymarketAPI(rate_limit=60)
+    db = Database(":memory:")
+    polymarket = get_shared_api(rate_limit=60)
     edge_detector = EdgeDetector(test_config, db)
     position_sizer = PositionSizer(test_config)
     risk_manager = RiskManager(test_config, db)
     
-    print("Fetching markets from Polymarket...")
-    try:
-        # Get active markets - use same logic as main bot
-        all_markets = []
-        categories = ['politics', 'crypto', 'sports', 'entertainment']
+    # Get active markets - use same logic as main bot
+    categories = ['politics', 'crypto', 'sports', 'entertainment']
+    min_liquidity = 0  # Lower for testing
+    max_to_test = 10
+    priced_markets = {}  # index -> (question, main_prob)
+    
+    async def analyze(index, market, session, semaphore):
+        """Analyze one market; returns number of opportunities found."""
+        market_id = market.get('id')
+        question = market.get('question', 'Unknown')
+        output = [f"[{index}/{max_to_test}] Testing: {question[:60]}..."]
+        found = 0
         
-        for category in categories:
-            try:
-                markets = polymarket.get_markets(category=category, active=True, limit=50)
-                all_markets.extend(markets)
-                print(f"  Fetched {len(markets)} markets from {category}")
-            except Exception as e:
-                print(f"  ⚠ Error fetching {category}: {e}")
+        async def limited(awaitable):
+            async with semaphore:
+                return await awaitable
         
-        # Filter by liquidity (same as main bot)
-        min_liquidity = 0  # Lower for testing
-        filtered_markets = [
-            m for m in all_markets
-            if float(m.get('liquidity', 0)) >= min_liquidity
-        ]
+        try:
+            # Issue the endpoint calls for this market concurrently; prices
+            # come from the market details, so they need no request of their own
+            market_details, volume_4h, trades = await asyncio.gather(
+                limited(polymarket.aget_market(market_id, session=session)),
+                limited(asyncio.to_thread(polymarket.get_market_volume, market_id, hours=4)),
+                limited(polymarket.aget_trades(market_id=market_id, limit=20, session=session))
+            )
+            
+            # Get full market data first
+            if not market_details:
+                output.append("  ⚠ Market not found")
+                return found
+            
+            # Check if market is actually active and has tokens
+            if not market_details.get('active', True):
+                output.append("  ⚠ Market is not active")
+                return found
+            
+            # Check for tokens (active markets have tokens with prices)
+            tokens = market_details.get('tokens', [])
+            if not tokens:
+                output.append("  ⚠ No tokens available (market may be resolved)")
+                return found
+            
+            # Get market prices
+            prices = {token.get('outcome', ''): float(token.get('price', 0.0)) for token in tokens}
+            if not prices or len(prices) == 0:
+                output.append("  ⚠ No price data available")
+                return found
+            
+            # Successfully got price data!
+            main_prob = max(prices.values()) if prices else 0.5
+            output.append(f"  ✅ Market active! Current probability: {main_prob:.1%}")
+            
+            volume_24h = float(market.get('volume', 0) or market_details.get('volume', 0))
+            
+            # Store in database for history
+            db.add_historical_probability(market_id, main_prob, volume_24h)
+            
+            # Test volume spike detection
+            if volume_4h > 0:
+                spike = edge_detector.detect_volume_spike(market_id, volume_4h, hours=4)
+                if spike:
+                    found += 1
+                    output.append(f"  ✅ VOLUME SPIKE DETECTED!")
+                    output.append(f"     Ratio: {spike['spike_ratio']:.2f}x")
+                    output.append(f"     Current: ${volume_4h:.2f}, Average: ${spike['average_volume']:.2f}")
+            
+            # Test trade size detection
+            if trades:
+                unusual = edge_detector.detect_unusual_trade_size(trades, min_size_usd=test_config['min_trade_size_usd'])
+                if unusual:
+                    found += 1
+                    output.append(f"  ✅ UNUSUAL TRADE SIZE DETECTED!")
+                    output.append(f"     Found {len(unusual['trades'])} large trades")
+            
+            # Position sizing runs vectorized once all markets are fetched
+            priced_markets[index] = (question, main_prob)
+            
+        except CircuitBreakerError as e:
+            # The sync volume call is breaker-guarded; a trip means the API
+            # has kept failing after retries
+            output.append(f"  ⚠ Polymarket API unavailable: {e}")
         
-        print(f"\nTotal markets found: {len(all_markets)}")
-        print(f"Markets with liquidity: {len(filtered_markets)}")
-        print()
+        except (aiohttp.ClientError, requests.RequestException) as e:
+            # e.g. a 404 for a stale market, or a 429/5xx still failing after
+            # the client's retries: report it for this market only
+            output.append(f"  ⚠ Error: {e}")
         
-        opportunities_found = 0
-        tested_count = 0
-        max_to_test = 10
+        except asyncio.TimeoutError:
+            output.append("  ⚠ Error: request timed out")
         
-        for market in filtered_markets:
-            if tested_count >= max_to_test:
-                break
-                
-            market_id = market.get('id')
-            question = market.get('question', 'Unknown')
-            
-            tested_count += 1
-            print(f"[{tested_count}/{max_to_test}] Testing: {question[:60]}...")
-            
-            try:
-                # Get full market data first
-                market_details = polymarket.get_market(market_id)
-                if not market_details:
-                    print("  ⚠ Market not found")
-                    continue
-                
-                # Check if market is actually active and has tokens
-                if not market_details.get('active', True):
-                    print("  ⚠ Market is not active")
-                    continue
-                
-                # Check for tokens (active markets have tokens with prices)
-                tokens = market_details.get('tokens', [])
-                if not tokens:
-                    print("  ⚠ No tokens available (market may be resolved)")
-                    continue
-                
-                # Get market prices
-                prices = polymarket.get_market_prices(market_id)
-                if not prices or len(prices) == 0:
-                    print("  ⚠ No price data available")
-                    continue
-                
-                # Successfully got price data!
-                main_prob = max(prices.values()) if prices else 0.5
-                print(f"  ✅ Market active! Current probability: {main_prob:.1%}")
-                
-                main_prob = max(prices.values()) if prices else 0.5
-                volume_24h = float(market.get('volume', 0) or market_details.get('volume', 0))
-                
-                # Store in database for history
-                db.add_historical_probability(market_id, main_prob, volume_24h)
-                
-                # Test volume spike detection
-                volume_4h = polymarket.get_market_volume(market_id, hours=4)
-                if volume_4h > 0:
-                    spike = edge_detector.detect_volume_spike(market_id, volume_4h, hours=4)
-                    if spike:
-                        opportunities_found += 1
-                        print(f"  ✅ VOLUME SPIKE DETECTED!")
-                        print(f"     Ratio: {spike['spike_ratio']:.2f}x")
-                        print(f"     Current: ${volume_4h:.2f}, Average: ${spike['average_volume']:.2f}")
-                
-                # Test trade size detection
-                trades = polymarket.get_trades(market_id=market_id, limit=20)
-                if trades:
-                    unusual = edge_detector.detect_unusual_trade_size(trades, min_size_usd=test_config['min_trade_size_usd'])
-                    if unusual:
-                        opportunities_found += 1
-                        print(f"  ✅ UNUSUAL TRADE SIZE DETECTED!")
-                        print(f"     Found {len(unusual['trades'])} large trades")
-                
-                # Test position sizing
-                fair_prob = main_prob * 1.05  # Assume 5% edge
-                sizing = position_sizer.calculate_position_size(main_prob, fair_prob)
-                ev = edge_detector.calculate_expected_value(main_prob, fair_prob, sizing['adjusted_size'])
-                
-                if ev >= test_config['notification_threshold_ev']:
-                    print(f"  ✅ POSITIVE EV: ${ev:.2f}")
-                    print(f"     Edge: {sizing['edge_pct']:.2f}%")
-                    print(f"     Suggested Size: ${sizing['adjusted_size']:.2f}")
-                
-            except Exception as e:
-                print(f"  ⚠ Error: {e}")
-            
+        except (ValueError, msgspec.DecodeError) as e:
+            # Malformed JSON or an unexpected /trades page shape
+            output.append(f"  ⚠ Error: invalid API response: {e}")
+        
+        finally:
+            # Print each market's block in one piece
+            print("\n".join(output))
             print()
         
-        print("=" * 60)
-        print("TEST SUMMARY")
-        print("=" * 60)
-        print(f"Markets tested: 5")
-        print(f"Opportunities detected: {opportunities_found}")
-        print()
+        return found
+    
+    async def fetch_and_analyze():
+        """Fetch all categories, then analyze markets; returns (tested, found)."""
+        async with aiohttp.ClientSession() as session:
+            print("Fetching markets from Polymarket...")
+            
+            # Fetch all categories concurrently (I/O bound)
+            results = await asyncio.gather(
+                *(polymarket.aget_markets(category, active=True, limit=50, session=session) for category in categories),
+                return_exceptions=True
+            )
+            all_markets = []
+            fetch_errors = []
+            for category, markets in zip(categories, results):
+                if isinstance(markets, Exception):
+                    fetch_errors.append(markets)
+                    print(f"  ⚠ Error fetching {category}: {markets}")
+                else:
+                    all_markets.extend(markets)
+                    print(f"  Fetched {len(markets)} markets from {category}")
+            
+            if not all_markets and fetch_errors and all(isinstance(e, aiohttp.ClientConnectionError) for e in fetch_errors):
+                pytest.skip(f"Polymarket API unreachable: {fetch_errors[0]}")
+            assert all_markets, "No markets returned from Polymarket"
+            
+            print(f"\nTotal markets found: {len(all_markets)}")
+            print()
+            
+            # Filter by liquidity (same as main bot), stopping at the first
+            # max_to_test matches instead of filtering every market
+            candidates = (
+                m for m in all_markets
+                if float(m.get('liquidity', 0) or 0) >= min_liquidity
+            )
+            sample = list(islice(candidates, max_to_test))
+            
+            # Cap in-flight requests; the client's rate limiter spaces them out
+            semaphore = asyncio.Semaphore(10)
+            found = await asyncio.gather(*(
+                analyze(index, market, session, semaphore)
+                for index, market in enumerate(sample, 1)
+            ))
+            return len(sample), sum(found)
+    
+    markets_tested, opportunities_found = asyncio.run(fetch_and_analyze())
+    
+    # Test position sizing: screen all priced markets in one NumPy pass,
+    # then size only the hits with the full PositionSizer
+    if priced_markets:
+        indices = sorted(priced_markets)
+        main = np.array([priced_markets[i][1] for i in indices], dtype=float)
+        fair = main * 1.05  # Assume 5% edge
         
-        if opportunities_found > 0:
-            print("✅ SUCCESS! Bot is detecting opportunities!")
-            print("   The bot is working correctly.")
-        else:
-            print("ℹ️  No opportunities found in test sample.")
-            print("   This is normal - the bot only flags real edges.")
-            print("   Try running with even lower thresholds or wait for market activity.")
+        with np.errstate(divide='ignore', invalid='ignore'):
+            odds = 1 / main - 1
+            kelly = (odds * fair - (1 - fair)) / odds * position_sizer.kelly_fraction
+            valid = (main > 0) & (main < 1) & (fair > 0) & (fair < 1) & (odds > 0)
+            max_size = position_sizer.bankroll * (position_sizer.max_exposure_pct / 100)
+            size = np.where(valid, np.minimum(np.maximum(kelly, 0) * position_sizer.bankroll, max_size), 0.0)
+            ev = np.where(valid, (fair / main - 1) * size, 0.0)
         
+        hits = np.flatnonzero(ev >= test_config['notification_threshold_ev'])
+        print(f"Position sizing: {len(hits)}/{len(indices)} priced markets with positive EV")
+        for i in hits:
+            question, main_prob = priced_markets[indices[i]]
+            sizing = position_sizer.calculate_position_size(main_prob, fair[i])
+            print(f"  ✅ POSITIVE EV: ${ev[i]:.2f} - {question[:60]}")
+            print(f"     Edge: {sizing['edge_pct']:.2f}%")
+            print(f"     Suggested Size: ${sizing['adjusted_size']:.2f}")
         print()
-        print("To see more detections, you can:")
-        print("1. Lower thresholds in config/config.yaml")
-        print("2. Run the bot continuously: python run.py")
-        print("3. Wait for actual market events/volatility")
-        
-    except Exception as e:
-        print(f"❌ ERROR: {e}")
-        import traceback
-        traceback.print_exc()
     
-    finally:
-        # Cleanup
-        if os.path.exists("data/test_bot.db"):
-            try:
-                os.remove("data/test_bot.db")
-            except:
-                pass
+    print("=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    print(f"Markets tested: {markets_tested}")
+    print(f"Opportunities detected: {opportunities_found}")
+    print()
+    
+    if opportunities_found > 0:
+        print("✅ SUCCESS! Bot is detecting opportunities!")
+        print("   The bot is working correctly.")
+    else:
+        print("ℹ️  No opportunities found in test sample.")
+        print("   This is normal - the bot only flags real edges.")
+        print("   Try running with even lower thresholds or wait for market activity.")
+    
+    print()
+    print("To see more detections, you can:")
+    print("1. Lower thresholds in config/config.yaml")
+    print("2. Run the bot continuously: python run.py")
+    print("3. Wait for actual market events/volatility")
 
 if __name__ == "__main__":
-    test_detection()
+    sys.exit(pytest.main([__file__, "-v", "-s", "-rs"]))
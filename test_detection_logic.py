@@ -2,14 +2,39 @@
 """Test that verifies the detection logic actually works."""
 import sys
 import os
+import json
+import time
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+import numpy as np
+import pytest
+import requests
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.config_manager import ConfigManager
-from src.database import Database
-from src.analysis import EdgeDetector, PositionSizer, RiskManager
-from src.data_ingestion import PolymarketAPI
+from src.database import Database, Base
+from src.analysis import EdgeDetector, PositionSizer, RiskManager, trades_to_array
+from src.data_ingestion import PolymarketAPI, CircuitBreakerError, get_shared_api
+
+@lru_cache(maxsize=1)
+def _cfg():
+    """Parse the YAML config once for all tests."""
+    return ConfigManager().get_all()
+
+@lru_cache(maxsize=1)
+def _db():
+    """Create the shared in-memory database once for all tests."""
+    return Database(":memory:")
+
+def _fresh_db():
+    """Return the shared database with all rows from earlier tests removed."""
+    db = _db()
+    with db.transaction() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            session.execute(table.delete())
+    return db
 
 def test_volume_spike_detection():
     """Test that volume spike detection works."""
@@ -17,33 +42,24 @@ def test_volume_spike_detection():
     print("TEST 1: Volume Spike Detection")
     print("=" * 60)
     
-    config = ConfigManager()
-    db = Database("data/test_detection.db")
-    edge_detector = EdgeDetector(config.get_all(), db)
+    db = _fresh_db()
+    edge_detector = EdgeDetector(_cfg(), db)
     
     # Create test market data
     market_id = "test_market_001"
     
     # Add historical data (low volume)
-    for i in range(5):
-        db.add_historical_probability(
-            market_id, 
-            0.5, 
-            100.0  # Low volume
-        )
+    db.add_historical_probabilities(market_id, [(0.5, 100.0) for _ in range(5)])
     
     # Test with high volume (should trigger)
     current_volume = 500.0  # 5x the average
     result = edge_detector.detect_volume_spike(market_id, current_volume, hours=4)
     
-    if result:
-        print(f"[PASS] Volume spike detected!")
-        print(f"   Spike ratio: {result['spike_ratio']:.2f}x")
-        print(f"   Current: ${current_volume:.2f}, Average: ${result['average_volume']:.2f}")
-        return True
-    else:
-        print(f"[FAIL] Volume spike NOT detected (expected spike at 5x)")
-        return False
+    assert result is not None, "Volume spike NOT detected (expected spike at 5x)"
+    assert result['spike_ratio'] > 1.0
+    print(f"[PASS] Volume spike detected!")
+    print(f"   Spike ratio: {result['spike_ratio']:.2f}x")
+    print(f"   Current: ${current_volume:.2f}, Average: ${result['average_volume']:.2f}")
 
 def test_unusual_trade_detection():
     """Test that unusual trade size detection works."""
@@ -51,9 +67,8 @@ def test_unusual_trade_detection():
     print("TEST 2: Unusual Trade Size Detection")
     print("=" * 60)
     
-    config = ConfigManager()
-    db = Database("data/test_detection.db")
-    edge_detector = EdgeDetector(config.get_all(), db)
+    db = _fresh_db()
+    edge_detector = EdgeDetector(_cfg(), db)
     
     # Create test trades
     now = datetime.now(timezone.utc)
@@ -65,15 +80,33 @@ def test_unusual_trade_detection():
     
     result = edge_detector.detect_unusual_trade_size(trades, min_size_usd=1000)
     
-    if result and len(result.get('trades', [])) > 0:
-        print(f"[PASS] Unusual trade detected!")
-        print(f"   Found {len(result['trades'])} large trades")
-        for trade in result['trades']:
-            print(f"   - ${trade['value_usd']:.2f} trade detected")
-        return True
-    else:
-        print(f"[FAIL] Unusual trade NOT detected (expected $1000+ trade)")
-        return False
+    assert result and result.get('trades'), "Unusual trade NOT detected (expected $1000+ trade)"
+    assert all(trade['value_usd'] >= 1000 for trade in result['trades'])
+    print(f"[PASS] Unusual trade detected!")
+    print(f"   Found {len(result['trades'])} large trades")
+    for trade in result['trades']:
+        print(f"   - ${trade['value_usd']:.2f} trade detected")
+    
+    # The structured-array form flags the same trades
+    array_result = edge_detector.detect_unusual_trade_size(trades_to_array(trades), min_size_usd=1000)
+    assert [t['value_usd'] for t in array_result['trades']] == [t['value_usd'] for t in result['trades']]
+    
+    # Same detector at production scale: 10,000 synthetic trades
+    rng = np.random.default_rng(0)
+    sizes = rng.exponential(500, 10_000)
+    prices = rng.uniform(0.01, 0.99, 10_000)
+    many_trades = [
+        {'trader_address': '0x0', 'size': float(size), 'price': float(price), 'timestamp': now}
+        for size, price in zip(sizes, prices)
+    ]
+    
+    start = time.perf_counter()
+    result = edge_detector.detect_unusual_trade_size(many_trades, min_size_usd=1000)
+    elapsed = time.perf_counter() - start
+    
+    expected = int((sizes * prices >= 1000).sum())
+    assert result is not None and len(result['trades']) == expected
+    print(f"   {len(many_trades):,} trades scanned in {elapsed * 1000:.1f}ms ({expected} flagged)")
 
 def test_probability_divergence():
     """Test that probability divergence detection works."""
@@ -81,9 +114,8 @@ def test_probability_divergence():
     print("TEST 3: Probability Divergence Detection")
     print("=" * 60)
     
-    config = ConfigManager()
-    db = Database("data/test_detection.db")
-    edge_detector = EdgeDetector(config.get_all(), db)
+    db = _fresh_db()
+    edge_detector = EdgeDetector(_cfg(), db)
     
     # Test with large divergence
     polymarket_prob = 0.50  # 50%
@@ -97,14 +129,11 @@ def test_probability_divergence():
         threshold_pct=12.0
     )
     
-    if result:
-        print(f"[PASS] Divergence detected!")
-        for source, data in result['divergences'].items():
-            print(f"   {source}: {data['divergence_pct']:.1f}% divergence")
-        return True
-    else:
-        print(f"[FAIL] Divergence NOT detected (expected 15% divergence)")
-        return False
+    assert result is not None, "Divergence NOT detected (expected 15% divergence)"
+    assert 'manifold' in result['divergences']
+    print(f"[PASS] Divergence detected!")
+    for source, data in result['divergences'].items():
+        print(f"   {source}: {data['divergence_pct']:.1f}% divergence")
 
 def test_position_sizing():
     """Test that position sizing works."""
@@ -112,8 +141,7 @@ def test_position_sizing():
     print("TEST 4: Position Sizing (Kelly Criterion)")
     print("=" * 60)
     
-    config = ConfigManager()
-    position_sizer = PositionSizer(config.get_all())
+    position_sizer = PositionSizer(_cfg())
     
     # Test with clear edge
     market_prob = 0.40  # Market says 40%
@@ -121,16 +149,12 @@ def test_position_sizing():
     
     sizing = position_sizer.calculate_position_size(market_prob, fair_prob)
     
-    if sizing['adjusted_size'] > 0:
-        print(f"[PASS] Position size calculated!")
-        print(f"   Market prob: {market_prob:.1%}, Fair prob: {fair_prob:.1%}")
-        print(f"   Edge: {sizing['edge_pct']:.2f}%")
-        print(f"   Suggested size: ${sizing['adjusted_size']:.2f}")
-        print(f"   % of bankroll: {sizing['bankroll_pct']:.2f}%")
-        return True
-    else:
-        print(f"[FAIL] Position size is $0 (expected positive size)")
-        return False
+    assert sizing['adjusted_size'] > 0, "Position size is $0 (expected positive size)"
+    print(f"[PASS] Position size calculated!")
+    print(f"   Market prob: {market_prob:.1%}, Fair prob: {fair_prob:.1%}")
+    print(f"   Edge: {sizing['edge_pct']:.2f}%")
+    print(f"   Suggested size: ${sizing['adjusted_size']:.2f}")
+    print(f"   % of bankroll: {sizing['bankroll_pct']:.2f}%")
 
 def test_expected_value_calculation():
     """Test that expected value calculation works."""
@@ -138,9 +162,8 @@ def test_expected_value_calculation():
     print("TEST 5: Expected Value Calculation")
     print("=" * 60)
     
-    config = ConfigManager()
-    db = Database("data/test_detection.db")
-    edge_detector = EdgeDetector(config.get_all(), db)
+    db = _fresh_db()
+    edge_detector = EdgeDetector(_cfg(), db)
     
     # Test with positive EV
     market_prob = 0.40
@@ -149,14 +172,10 @@ def test_expected_value_calculation():
     
     ev = edge_detector.calculate_expected_value(market_prob, fair_prob, bet_size)
     
-    if ev > 0:
-        print(f"[PASS] Positive EV calculated!")
-        print(f"   EV: ${ev:.2f}")
-        print(f"   This means the bet has positive expected value")
-        return True
-    else:
-        print(f"[FAIL] EV is ${ev:.2f} (expected positive)")
-        return False
+    assert ev > 0, f"EV is ${ev:.2f} (expected positive)"
+    print(f"[PASS] Positive EV calculated!")
+    print(f"   EV: ${ev:.2f}")
+    print(f"   This means the bet has positive expected value")
 
 def test_risk_management():
     """Test that risk management constraints work."""
@@ -164,114 +183,146 @@ def test_risk_management():
     print("TEST 6: Risk Management")
     print("=" * 60)
     
-    config = ConfigManager()
-    db = Database("data/test_detection.db")
-    risk_manager = RiskManager(config.get_all(), db)
+    db = _fresh_db()
+    risk_manager = RiskManager(_cfg(), db)
     
     # Test position limits
     can_take, reason = risk_manager.can_take_position(100.0)
     
-    if can_take:
-        print(f"[PASS] Risk manager allows position")
-        print(f"   Can take $100 position")
-        
-        # Test portfolio summary
-        portfolio = risk_manager.get_portfolio_summary()
-        print(f"   Current positions: {portfolio['open_positions']}")
-        print(f"   Max positions: {portfolio['max_positions']}")
-        print(f"   Exposure: ${portfolio['total_exposure_usd']:.2f} ({portfolio['exposure_pct']:.1f}%)")
-        return True
-    else:
-        print(f"[WARN] Position rejected: {reason}")
-        print(f"   This is OK if limits are already reached")
-        return True  # Still pass, just showing constraint works
+    # The database is empty, so no limit can already be reached
+    assert can_take, f"Position rejected: {reason}"
+    print(f"[PASS] Risk manager allows position")
+    print(f"   Can take $100 position")
+    
+    # Test portfolio summary
+    portfolio = risk_manager.get_portfolio_summary()
+    assert portfolio['open_positions'] <= portfolio['max_positions']
+    print(f"   Current positions: {portfolio['open_positions']}")
+    print(f"   Max positions: {portfolio['max_positions']}")
+    print(f"   Exposure: ${portfolio['total_exposure_usd']:.2f} ({portfolio['exposure_pct']:.1f}%)")
 
-def test_real_market_connection():
+@pytest.mark.parametrize('category', ['politics', 'crypto', 'sports', 'entertainment'])
+def test_real_market_connection(category):
     """Test that we can actually connect to Polymarket and get data."""
     print("\n" + "=" * 60)
-    print("TEST 7: Real Polymarket API Connection")
+    print(f"TEST 7: Real Polymarket API Connection ({category})")
     print("=" * 60)
     
+    api = get_shared_api()
     try:
-        api = PolymarketAPI()
-        markets = api.get_markets(category='politics', active=True, limit=5)
-        
-        if markets and len(markets) > 0:
-            print(f"[PASS] Connected to Polymarket API")
-            print(f"   Fetched {len(markets)} markets")
-            
-            # Try to get price data from first market
-            test_market = markets[0]
-            market_id = test_market.get('id')
-            
-            try:
-                prices = api.get_market_prices(market_id)
-                if prices:
-                    print(f"   [OK] Got price data for market: {test_market.get('question', 'Unknown')[:50]}...")
-                    print(f"   Prices: {prices}")
-                    return True
-                else:
-                    print(f"   [WARN] Market has no price data (may be resolved)")
-                    return True  # Still pass - API works
-            except Exception as e:
-                print(f"   [WARN] Could not get prices: {e}")
-                return True  # API connection works, just this market is old
-        else:
-            print(f"[FAIL] No markets returned from API")
-            return False
-    except Exception as e:
-        print(f"[FAIL] API connection error: {e}")
-        return False
+        # One request: the market listing already carries outcome prices
+        markets = api.get_markets_with_prices(category=category, active=True, limit=5)
+    except (requests.ConnectionError, CircuitBreakerError) as e:
+        pytest.skip(f"Polymarket API unreachable: {e}")
+    
+    assert markets, "No markets returned from API"
+    print(f"[PASS] Connected to Polymarket API")
+    print(f"   Fetched {len(markets)} markets")
+    
+    test_market = markets[0]
+    assert test_market.get('question') and test_market['prices'], "First market has no question or price data"
+    print(f"   [OK] Got price data for market: {test_market['question'][:50]}...")
+    print(f"   Prices: {test_market['prices']}")
 
-def main():
-    """Run all tests."""
+def test_rate_limited_request_is_retried():
+    """Test that a 429 from Polymarket is retried instead of failing the call."""
     print("\n" + "=" * 60)
-    print("BOT DETECTION LOGIC VERIFICATION TEST")
+    print("TEST 8: Retry on Rate Limiting (429)")
     print("=" * 60)
-    print("\nThis test verifies that each detection component actually works.")
-    print("It uses simulated data to prove the logic functions correctly.\n")
     
-    results = []
-    
-    # Run all tests
-    results.append(("Volume Spike Detection", test_volume_spike_detection()))
-    results.append(("Unusual Trade Detection", test_unusual_trade_detection()))
-    results.append(("Probability Divergence", test_probability_divergence()))
-    results.append(("Position Sizing", test_position_sizing()))
-    results.append(("Expected Value", test_expected_value_calculation()))
-    results.append(("Risk Management", test_risk_management()))
-    results.append(("API Connection", test_real_market_connection()))
+    class FakeSession:
+        """Answers the first request with 429 and the rest with 200."""
+        def __init__(self):
+            self.calls = 0
+        
+        def get(self, url, params=None, timeout=None):
+            self.calls += 1
+            response = requests.Response()
+            response.url = url
+            if self.calls == 1:
+                response.status_code = 429
+                response.reason = "Too Many Requests"
+                response._content = b'{}'
+            else:
+                response.status_code = 200
+                response._content = b'[{"id": "1", "question": "Retried?"}]'
+            return response
+    
+    api = PolymarketAPI(rate_limit=6000)
+    api.session = FakeSession()
+    
+    markets = api.get_markets(limit=1)
+    
+    assert api.session.calls == 2, f"Expected one retry, got {api.session.calls - 1}"
+    assert markets == [{'id': '1', 'question': 'Retried?'}]
+    print(f"[PASS] 429 retried; call succeeded on attempt {api.session.calls}")
+
+def test_market_volume_aggregate():
+    """Test that stored trade volume is summed in SQL over the window only."""
+    print("\n" + "=" * 60)
+    print("TEST 9: Stored Trade Volume Aggregate")
+    print("=" * 60)
     
-    # Summary
+    db = _fresh_db()
+    now = datetime.now(timezone.utc)
+    rows = [
+        # (market_id, size, price, age)
+        ('vol_market', 100, 0.5, timedelta(minutes=5)),            # $50, inside
+        ('vol_market', 200, 0.25, timedelta(hours=4, minutes=-1)), # $50, just inside
+        ('vol_market', 1000, 0.5, timedelta(hours=4, minutes=1)),  # $500, just outside
+        ('other_market', 1000, 0.5, timedelta(minutes=5)),         # other market
+    ]
+    with db.transaction() as session:
+        for market_id, size, price, age in rows:
+            db.add_trade({
+                'market_id': market_id,
+                'trader_address': '0xabc',
+                'side': 'buy',
+                'size': size,
+                'price': price,
+                'timestamp': now - age
+            }, session=session)
+    
+    assert db.get_market_volume('vol_market', hours=4) == pytest.approx(100.0)
+    assert db.get_market_volume('vol_market', hours=5) == pytest.approx(600.0)
+    assert db.get_market_volume('no_trades', hours=4) == 0.0
+    print(f"[PASS] 4h volume ${db.get_market_volume('vol_market', hours=4):.2f} (window edges respected)")
+
+def test_markets_with_prices():
+    """Test that listed markets get prices from tokens or outcomePrices."""
     print("\n" + "=" * 60)
-    print("TEST SUMMARY")
+    print("TEST 10: Prices From the Market Listing")
     print("=" * 60)
     
-    passed = sum(1 for _, result in results if result)
-    total = len(results)
-    
-    for name, result in results:
-        status = "[PASS]" if result else "[FAIL]"
-        print(f"{name}: {status}")
-    
-    print(f"\nResults: {passed}/{total} tests passed")
-    
-    if passed == total:
-        print("\n[SUCCESS] All detection logic is working correctly!")
-        print("   The bot CAN detect opportunities when they exist.")
-    elif passed >= total * 0.8:
-        print("\n[OK] MOSTLY WORKING! Most detection logic is functional.")
-        print("   Review failed tests above.")
-    else:
-        print("\n[WARN] SOME ISSUES: Some detection logic needs attention.")
-        print("   Review failed tests above.")
-    
-    # Cleanup
-    if os.path.exists("data/test_detection.db"):
-        try:
-            os.remove("data/test_detection.db")
-        except:
-            pass
+    # Gamma encodes outcomes/outcomePrices as JSON strings inside the JSON
+    listing = json.dumps([
+        {'id': '1', 'question': 'Tokens?',
+         'tokens': [{'outcome': 'Yes', 'price': 0.3}, {'outcome': 'No', 'price': 0.7}]},
+        {'id': '2', 'question': 'Encoded?',
+         'outcomes': json.dumps(['Yes', 'No']), 'outcomePrices': json.dumps(['0.65', '0.35'])},
+        {'id': '3', 'question': 'Resolved?'},
+    ]).encode()
+    
+    class FakeSession:
+        """Answers every request with the market listing above."""
+        def get(self, url, params=None, timeout=None):
+            response = requests.Response()
+            response.url = url
+            response.status_code = 200
+            response._content = listing
+            return response
+    
+    api = PolymarketAPI(rate_limit=6000)
+    api.session = FakeSession()
+    
+    markets = api.get_markets_with_prices(limit=3)
+    
+    assert [m['prices'] for m in markets] == [
+        {'Yes': 0.3, 'No': 0.7},
+        {'Yes': 0.65, 'No': 0.35},
+        {}
+    ]
+    print(f"[PASS] Prices extracted for {sum(bool(m['prices']) for m in markets)}/{len(markets)} markets")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(pytest.main([__file__, "-v", "-s", "-rs"]))
@@ -3,82 +3,74 @@
 import sys
 import os
 
+import pytest
+import requests
+
+try:
+    from src.config_manager import ConfigManager
+    from src.logger_setup import setup_logger
+    from src.database import Database
+    from src.data_ingestion import CircuitBreakerError, get_shared_api
+    from src.analysis import EdgeDetector
+    _IMPORT_ERROR = None
+except ImportError as e:
+    _IMPORT_ERROR = e
+
+REQUIRED_MODULES = (
+    "src.config_manager",
+    "src.logger_setup",
+    "src.database",
+    "src.data_ingestion",
+    "src.analysis",
+)
+
 def test_imports():
     """Test that all required modules can be imported."""
     print("Testing imports...")
-    try:
-        from src.config_manager import ConfigManager
-        from src.logger_setup import setup_logger
-        from src.database import Database
-        from src.data_ingestion import PolymarketAPI
-        from src.analysis import EdgeDetector
-        print("[OK] All imports successful")
-        return True
-    except ImportError as e:
-        print(f"[ERROR] Import error: {e}")
-        return False
+    assert _IMPORT_ERROR is None, f"Import error: {_IMPORT_ERROR}"
+    
+    missing = [m for m in REQUIRED_MODULES if m not in sys.modules]
+    assert not missing, f"Modules not loaded: {missing}"
+    print("[OK] All imports successful")
 
 def test_config():
     """Test configuration loading."""
     print("\nTesting configuration...")
-    try:
-        from src.config_manager import ConfigManager
-        config = ConfigManager()
-        poll_interval = config.get('poll_interval_minutes')
-        print(f"[OK] Config loaded successfully (poll interval: {poll_interval} min)")
-        return True
-    except Exception as e:
-        print(f"[ERROR] Config error: {e}")
-        print("  Make sure config/config.yaml exists")
-        return False
+    config = ConfigManager()
+    poll_interval = config.get('poll_interval_minutes')
+    assert poll_interval, "poll_interval_minutes missing from config/config.yaml"
+    print(f"[OK] Config loaded successfully (poll interval: {poll_interval} min)")
 
-def test_database():
+def test_database(tmp_path):
     """Test database initialization."""
     print("\nTesting database...")
-    try:
-        from src.database import Database
-        db = Database("data/test.db")
-        print("[OK] Database initialized successfully")
-        # Clean up test database (close session first)
+    db_path = tmp_path / "test.db"
+    with Database(str(db_path)) as db:
         session = db.get_session()
         session.close()
-        db.engine.dispose()
-        import time
-        time.sleep(0.1)  # Brief wait for file handle release
-        if os.path.exists("data/test.db"):
-            try:
-                os.remove("data/test.db")
-            except:
-                pass  # Ignore if still locked
-        return True
-    except Exception as e:
-        print(f"[ERROR] Database error: {e}")
-        return False
+    
+    # Leaving the block disposes the engine, so the file is not held open
+    db_path.unlink()
+    print("[OK] Database initialized successfully")
 
 def test_polymarket_api():
     """Test Polymarket API connection."""
     print("\nTesting Polymarket API...")
+    api = get_shared_api()
     try:
-        from src.data_ingestion import PolymarketAPI
-        api = PolymarketAPI()
         markets = api.get_markets(limit=1)
-        if markets:
-            print(f"[OK] Polymarket API working (fetched {len(markets)} market)")
-        else:
-            print("[WARN] Polymarket API connected but no markets returned")
-        return True
-    except Exception as e:
-        print(f"[ERROR] Polymarket API error: {e}")
-        print("  Check your internet connection")
-        return False
+    except (requests.ConnectionError, CircuitBreakerError) as e:
+        pytest.skip(f"Polymarket API unreachable, check your internet connection: {e}")
+    
+    if markets:
+        print(f"[OK] Polymarket API working (fetched {len(markets)} market)")
+    else:
+        print("[WARN] Polymarket API connected but no markets returned")
 
 def test_environment():
     """Test environment variables."""
     print("\nTesting environment variables...")
-    from dotenv import load_dotenv
-    load_dotenv()
-    
-    import os
+    # conftest.py has already loaded .env for the session
     telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
     telegram_chat = os.getenv('TELEGRAM_CHAT_ID')
     
@@ -91,40 +83,6 @@ def test_environment():
         print("[OK] Telegram chat ID found")
     else:
         print("[WARN] Telegram chat ID not configured (optional for testing)")
-    
-    return True
-
-def main():
-    """Run all tests."""
-    print("=" * 50)
-    print("Polymarket Bot Setup Test")
-    print("=" * 50)
-    
-    results = []
-    results.append(("Imports", test_imports()))
-    results.append(("Configuration", test_config()))
-    results.append(("Database", test_database()))
-    results.append(("Polymarket API", test_polymarket_api()))
-    results.append(("Environment", test_environment()))
-    
-    print("\n" + "=" * 50)
-    print("Test Summary")
-    print("=" * 50)
-    
-    for name, result in results:
-        status = "[PASS]" if result else "[FAIL]"
-        print(f"{name}: {status}")
-    
-    all_passed = all(r[1] for r in results)
-    
-    if all_passed:
-        print("\n[SUCCESS] All critical tests passed! Bot is ready to run.")
-        print("\nNext steps:")
-        print("1. Configure .env file with Telegram credentials (optional)")
-        print("2. Run: python run.py --once")
-    else:
-        print("\n[ERROR] Some tests failed. Please fix the issues above.")
-        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(pytest.main([__file__, "-v", "-s", "-rs"]))
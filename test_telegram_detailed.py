@@ -1,101 +1,383 @@
 #!/usr/bin/env python
-"""Detailed Telegram test with error reporting."""
-import sys
-import os
-from dotenv import load_dotenv
-
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-load_dotenv()
+"""Detailed Telegram test with error reporting.
 
+Run from the repository root with ``python -m test_telegram_detailed`` or
+under pytest; it needs nothing from ``src``, so no sys.path setup.
+"""
 import asyncio
+import hashlib
+import json
+import os
+import ssl
+import sys
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Union
+from urllib.parse import urlsplit
+
+import certifi
+import pytest
+from dotenv import dotenv_values
 from telegram import Bot
-from telegram.error import TelegramError, BadRequest
+from telegram.ext import AIORateLimiter, ExtBot
+from telegram.request import HTTPXRequest
+from telegram.error import TelegramError, BadRequest, Forbidden, NetworkError
+
 try:
-    from telegram.error import Unauthorized
+    import uvloop
+    _run = uvloop.run
 except ImportError:
-    # For newer versions
-    from telegram.error import Forbidden as Unauthorized
+    # uvloop is optional (and unavailable on Windows)
+    _run = asyncio.run
+
+@dataclass(frozen=True)
+class _Config:
+    """Telegram credentials, resolved once at import."""
+    bot_token: Optional[str]
+    chat_id: Optional[Union[int, str]]
+    # MTProto (Telethon) mode, enabled with TELEGRAM_TEST_MTPROTO=1
+    mtproto: bool = False
+    api_id: Optional[str] = None
+    api_hash: Optional[str] = None
+    # Public HTTPS URL (e.g. an ngrok tunnel) forwarding to the local
+    # webhook listener; unset means delivery-only mode
+    webhook_url: Optional[str] = None
+    webhook_port: int = 8443
+
+def _parse_chat_id(raw):
+    """Numeric chat IDs become ints once; @channel usernames stay strings."""
+    return int(raw) if raw and raw.lstrip('-').isdigit() else raw
 
-async def test_telegram_async():
-    """Test Telegram with detailed error reporting."""
-    print("=" * 60)
-    print("DETAILED TELEGRAM TEST")
-    print("=" * 60)
-    print()
+# Real environment variables win over .env, as with load_dotenv()
+_ENV = {**dotenv_values(), **os.environ}
+_CONFIG = _Config(
+    bot_token=_ENV.get('TELEGRAM_BOT_TOKEN'),
+    chat_id=_parse_chat_id(_ENV.get('TELEGRAM_CHAT_ID')),
+    mtproto=_ENV.get('TELEGRAM_TEST_MTPROTO', '').lower() in ('1', 'true', 'yes'),
+    api_id=_ENV.get('TELEGRAM_API_ID'),
+    api_hash=_ENV.get('TELEGRAM_API_HASH'),
+    webhook_url=_ENV.get('TELEGRAM_TEST_WEBHOOK_URL'),
+    webhook_port=int(_ENV.get('TELEGRAM_TEST_WEBHOOK_PORT', 8443))
+)
+# Unset, empty and env.example placeholder values all mean "not configured"
+_BAD = frozenset({None, '', 'your_telegram_bot_token_here', 'your_telegram_chat_id_here'})
+
+_BANNER = "=" * 60
+_HEADER = f"{_BANNER}\nDETAILED TELEGRAM TEST\n{_BANNER}\n\n"
+_FOOTER_OK = f"\n{_BANNER}\nRESULT: SUCCESS - Check your Telegram!\n{_BANNER}\n"
+_FOOTER_FAIL = f"\n{_BANNER}\nRESULT: FAILED - See errors above\n{_BANNER}\n"
+# Parse the CA bundle once; every Bot's httpx client reuses this context
+_SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+# getMe answers, keyed by sha256(token) so the token itself is never stored
+_ME_CACHE = Path('~/.cache/polymarket_tg.json').expanduser()
+_ME_CACHE_TTL = 3600  # seconds
+
+@lru_cache(maxsize=4)
+def _get_bot(token):
+    """Build one Bot per token, with a pooled HTTP client shared by all calls.
     
-    bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
-    chat_id = os.getenv('TELEGRAM_CHAT_ID')
+    The client speaks HTTP/2 when h2 is installed. When the rate-limiter
+    extra (aiolimiter) is installed, sends go through AIORateLimiter so
+    batches stay under Telegram's 30 messages/s cap.
+    """
+    options = dict(connection_pool_size=8, pool_timeout=10.0, httpx_kwargs={'verify': _SSL_CONTEXT})
+    try:
+        # HTTP/2 multiplexes the concurrent calls over one TLS connection
+        request = HTTPXRequest(http_version='2', **options)
+    except RuntimeError:
+        # h2 not installed (python-telegram-bot[http2]); stay on HTTP/1.1
+        request = HTTPXRequest(**options)
+    try:
+        rate_limiter = AIORateLimiter(max_retries=3)
+    except RuntimeError:
+        return Bot(token=token, request=request)
+    return ExtBot(token=token, request=request, rate_limiter=rate_limiter)
+
+def _load_me_cache():
+    """Read the getMe cache; a missing or corrupt file is an empty cache."""
+    try:
+        return json.loads(_ME_CACHE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+def _cached_identity(token):
+    """Return the cached bot username/name for token, or None if stale or absent."""
+    entry = _load_me_cache().get(hashlib.sha256(token.encode()).hexdigest())
+    if entry and time.time() - entry.get('ts', 0) < _ME_CACHE_TTL:
+        return entry
+    return None
+
+def _store_identity(token, identity):
+    """Cache a getMe answer for token; failures to write are ignored."""
+    cache = _load_me_cache()
+    cache[hashlib.sha256(token.encode()).hexdigest()] = {**identity, 'ts': time.time()}
+    try:
+        _ME_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        _ME_CACHE.write_text(json.dumps(cache))
+    except OSError:
+        pass
+
+async def _check_telegram_mtproto(log, bot_token, chat_ids, count):
+    """Run the bot-info and send checks over MTProto with Telethon.
     
-    if not bot_token or bot_token == 'your_telegram_bot_token_here':
-        print("[ERROR] TELEGRAM_BOT_TOKEN not configured!")
+    One persistent binary-protocol connection carries every call instead
+    of one HTTPS request each. Needs TELEGRAM_API_ID/TELEGRAM_API_HASH
+    from my.telegram.org and the optional telethon package.
+    """
+    try:
+        from telethon import TelegramClient
+    except ImportError:
+        log("[ERROR] MTProto mode needs Telethon: pip install telethon\n")
         return False
     
-    if not chat_id or chat_id == 'your_telegram_chat_id_here':
-        print("[ERROR] TELEGRAM_CHAT_ID not configured!")
+    if _CONFIG.api_id in _BAD or _CONFIG.api_hash in _BAD:
+        log("[ERROR] TELEGRAM_API_ID and TELEGRAM_API_HASH are required for MTProto mode\n")
         return False
     
-    print(f"Bot Token: {bot_token[:15]}...{bot_token[-5:]}")
-    print(f"Chat ID: {chat_id}")
-    print()
+    # No session name: keep the session in memory instead of a .session file
+    client = TelegramClient(None, int(_CONFIG.api_id), _CONFIG.api_hash)
+    try:
+        # Inside the try: a rejected token or api_id must still disconnect
+        await client.start(bot_token=bot_token)
+        log("[OK] MTProto client connected\n")
+        
+        message = "Test message from Polymarket Bot"
+        me, *results = await asyncio.gather(
+            client.get_me(),
+            *(
+                client.send_message(target, message if count == 1 else f"{message} ({i}/{count})")
+                for target in chat_ids
+                for i in range(1, count + 1)
+            ),
+            return_exceptions=True
+        )
+    finally:
+        await client.disconnect()
+    
+    log("\n[TEST 1] Getting bot information...\n")
+    if isinstance(me, Exception):
+        log(f"[ERROR] Failed to get bot info: {me}\n")
+        return False
+    log(f"[OK] Bot username: @{me.username}\n")
+    log(f"[OK] Bot name: {me.first_name}\n")
+    
+    log(f"\n[TEST 2] Sending {len(results)} test message(s)...\n")
+    sent = True
+    for result in results:
+        if isinstance(result, Exception):
+            log(f"[ERROR] Failed to send message: {result}\n")
+            sent = False
+        else:
+            log(f"[SUCCESS] Message sent to {result.chat_id}! Message ID: {result.id}\n")
+    return sent
+
+async def _check_webhook(log, bot, url, port):
+    """Round-trip the webhook setup through a throwaway local aiohttp listener.
+    
+    Registers url with set_webhook, reads it back with get_webhook_info and
+    always removes it again with delete_webhook. Refuses to run if the bot
+    already has a webhook, since deleting it would break that deployment.
+    """
+    from aiohttp import web
+    
+    received = []
+    
+    async def handle_update(request):
+        received.append(await request.json())
+        return web.Response()
     
+    app = web.Application()
+    app.router.add_post(urlsplit(url).path or '/', handle_update)
+    runner = web.AppRunner(app)
+    await runner.setup()
     try:
-        # Initialize bot
-        bot = Bot(token=bot_token)
-        print("[OK] Bot initialized")
+        await web.TCPSite(runner, 'localhost', port).start()
+        log(f"[OK] Webhook listener on localhost:{port}\n")
         
-        # Test 1: Get bot info
-        print("\n[TEST 1] Getting bot information...")
-        try:
-            bot_info = await bot.get_me()
-            print(f"[OK] Bot username: @{bot_info.username}")
-            print(f"[OK] Bot name: {bot_info.first_name}")
-        except Unauthorized:
-            print("[ERROR] Bot token is invalid!")
-            return False
-        except Exception as e:
-            print(f"[ERROR] Failed to get bot info: {e}")
+        previous = await bot.get_webhook_info()
+        if previous.url:
+            log(f"[ERROR] Bot already has a webhook ({previous.url}); not replacing it\n")
             return False
         
-        # Test 2: Send simple message
-        print("\n[TEST 2] Sending simple test message...")
+        await bot.set_webhook(url)
         try:
+            info = await bot.get_webhook_info()
+        finally:
+            await bot.delete_webhook()
+    finally:
+        await runner.cleanup()
+    
+    if info.url != url:
+        log(f"[ERROR] Webhook not registered (Telegram reports {info.url!r})\n")
+        return False
+    log(f"[OK] Webhook registered: {info.url}\n")
+    log(f"[OK] Pending updates: {info.pending_update_count}, received: {len(received)}\n")
+    if info.last_error_message:
+        log(f"   -> Last delivery error: {info.last_error_message}\n")
+    log("[OK] Webhook removed\n")
+    return True
+
+def _report_send(log, result):
+    """Log the outcome of one send_message call; returns True if it was sent."""
+    if isinstance(result, BadRequest):
+        log(f"[ERROR] Bad Request: {result}\n")
+        if "chat not found" in str(result).lower():
+            log("   -> Chat ID is incorrect or bot hasn't been added to chat\n")
+        elif "not enough rights" in str(result).lower():
+            log("   -> Bot doesn't have permission to send messages\n")
+        return False
+    if isinstance(result, Forbidden):
+        log("[ERROR] Bot is unauthorized\n")
+        log("   -> Bot token might be wrong or bot was deleted\n")
+        return False
+    if isinstance(result, TelegramError):
+        log(f"[ERROR] Telegram error: {result}\n")
+        if isinstance(result, NetworkError):
+            log("   -> Check your internet connection and DNS settings\n")
+        return False
+    if isinstance(result, Exception):
+        raise result
+    log(f"[SUCCESS] Message sent to {result.chat_id}! Message ID: {result.message_id}\n")
+    return True
+
+async def test_telegram_async(count=1, chat_ids=None):
+    """Test Telegram with detailed error reporting.
+    
+    Args:
+        count: Number of probe messages to send to each chat
+        chat_ids: Chats to probe (default: TELEGRAM_CHAT_ID)
+        
+    Returns:
+        True if the bot is valid and every probe was delivered
+    """
+    parts = []
+    try:
+        return await _check_telegram(parts.append, count, chat_ids)
+    finally:
+        # One write for the whole report instead of a print per status line
+        sys.stdout.write(''.join(parts))
+
+async def _check_telegram(log, count, chat_ids):
+    """Run the checks for test_telegram_async, passing each output line to log."""
+    log(_HEADER)
+    
+    bot_token = _CONFIG.bot_token
+    chat_id = _CONFIG.chat_id
+    
+    if bot_token in _BAD:
+        log("[ERROR] TELEGRAM_BOT_TOKEN not configured!\n")
+        return False
+    
+    if chat_id in _BAD:
+        log("[ERROR] TELEGRAM_CHAT_ID not configured!\n")
+        return False
+    
+    chat_ids = chat_ids or [chat_id]
+    
+    try:
+        if not _CONFIG.mtproto:
+            bot = _get_bot(bot_token)
+            
+            # Tests 1 and 2 are independent round-trips, so run them together;
+            # all probes share the bot's connection pool
             message = "Test message from Polymarket Bot"
-            result = await bot.send_message(chat_id=chat_id, text=message)
-            print(f"[SUCCESS] Message sent! Message ID: {result.message_id}")
-            print("   Check your Telegram - you should see this message")
-            return True
-        except BadRequest as e:
-            print(f"[ERROR] Bad Request: {e}")
-            if "chat not found" in str(e).lower():
-                print("   -> Chat ID is incorrect or bot hasn't been added to chat")
-            elif "not enough rights" in str(e).lower():
-                print("   -> Bot doesn't have permission to send messages")
-            return False
-        except Unauthorized:
-            print("[ERROR] Bot is unauthorized")
-            print("   -> Bot token might be wrong or bot was deleted")
-            return False
-        except TelegramError as e:
-            print(f"[ERROR] Telegram error: {e}")
+            probes = [
+                bot.send_message(chat_id=target, text=message if count == 1 else f"{message} ({i}/{count})")
+                for target in chat_ids
+                for i in range(1, count + 1)
+            ]
+            # A getMe answer from the last hour skips that round-trip
+            identity = _cached_identity(bot_token)
+            pending = asyncio.gather(
+                *(probes if identity else [bot.get_me(), *probes]),
+                return_exceptions=True
+            )
+            # One loop turn lets the requests hand their DNS lookups to the
+            # resolver thread, so connection setup overlaps the output below
+            await asyncio.sleep(0)
+        
+        log(f"Bot Token: {bot_token[:15]}...{bot_token[-5:]}\n")
+        log(f"Chat ID: {', '.join(map(str, chat_ids))}\n")
+        log("\n")
+        
+        if _CONFIG.mtproto:
+            return await _check_telegram_mtproto(log, bot_token, chat_ids, count)
+        
+        log("[OK] Bot initialized\n")
+        results = await pending
+        
+        # Test 1: Get bot info
+        log("\n[TEST 1] Getting bot information...\n")
+        if identity:
+            log(f"[OK] Using cached bot info ({_ME_CACHE})\n")
+        else:
+            bot_info = results.pop(0)
+            if isinstance(bot_info, Forbidden):
+                log("[ERROR] Bot token is invalid!\n")
+                return False
+            if isinstance(bot_info, Exception):
+                log(f"[ERROR] Failed to get bot info: {bot_info}\n")
+                if isinstance(bot_info, NetworkError):
+                    log("   -> Check your internet connection and DNS settings\n")
+                return False
+            identity = {'username': bot_info.username, 'first_name': bot_info.first_name}
+            _store_identity(bot_token, identity)
+        log(f"[OK] Bot username: @{identity['username']}\n")
+        log(f"[OK] Bot name: {identity['first_name']}\n")
+        
+        # Test 2: Send simple message(s)
+        log(f"\n[TEST 2] Sending {len(results)} test message(s)...\n")
+        sent = [_report_send(log, result) for result in results]
+        if not all(sent):
             return False
+        log("   Check your Telegram - you should see the message(s)\n")
+        
+        # Test 3: Webhook round-trip (the path production bots use)
+        log("\n[TEST 3] Checking webhook setup...\n")
+        if not _CONFIG.webhook_url:
+            log("[SKIP] Set TELEGRAM_TEST_WEBHOOK_URL to a public HTTPS tunnel to localhost\n")
+            return True
+        return await _check_webhook(log, bot, _CONFIG.webhook_url, _CONFIG.webhook_port)
         
+    except TelegramError as e:
+        # Expected API failure (e.g. a rejected webhook URL): report it in
+        # one line without walking frames or reading source files
+        import traceback
+        log("[ERROR] " + ''.join(traceback.format_exception_only(type(e), e)))
+        return False
     except Exception as e:
-        print(f"[ERROR] Unexpected error: {e}")
+        log(f"[ERROR] Unexpected error: {e}\n")
         import traceback
-        traceback.print_exc()
+        log(traceback.format_exc())
         return False
 
+# Run through the synchronous wrapper below; pytest has no async runner here
+test_telegram_async.__test__ = False
+
+@pytest.mark.skipif(
+    _CONFIG.bot_token in _BAD or _CONFIG.chat_id in _BAD,
+    reason="TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID not configured in .env"
+)
+def test_telegram_detailed():
+    """Run the detailed Telegram test under pytest."""
+    assert _run(test_telegram_async()), "Detailed Telegram test failed - see errors above"
+
 def main():
     """Run async test."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Detailed Telegram bot test')
+    parser.add_argument('--count', type=int, default=1,
+                       help='Probe messages to send to each chat')
+    parser.add_argument('--chat-id', action='append', dest='chat_ids', type=_parse_chat_id,
+                       help='Chat to probe (repeatable; default: TELEGRAM_CHAT_ID)')
+    args = parser.parse_args()
+    
     try:
-        result = asyncio.run(test_telegram_async())
-        print("\n" + "=" * 60)
-        if result:
-            print("RESULT: SUCCESS - Check your Telegram!")
-        else:
-            print("RESULT: FAILED - See errors above")
-        print("=" * 60)
+        result = _run(test_telegram_async(args.count, args.chat_ids))
+        sys.stdout.write(_FOOTER_OK if result else _FOOTER_FAIL)
     except Exception as e:
         print(f"\n[FATAL ERROR] {e}")
         import traceback